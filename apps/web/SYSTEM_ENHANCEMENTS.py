@@ -10,30 +10,360 @@ Enhancements:
 3. Complete Automation (Offer Letters, Viewings, Follow-ups, CRM)
 """
 
+from __future__ import annotations
+
 import os
 import sys
-import json
+import hashlib
 import logging
 from datetime import datetime
-from pathlib import Path
-from typing import Dict, List, Any
+from types import MappingProxyType
+from typing import Mapping, TypedDict
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    import json
+    orjson = None
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+_BAR = "=" * 80
+_BANNER_FORMAT = "\n" + _BAR + "\n%s\n" + _BAR
+
+
+def _banner(title: str) -> None:
+    """Log a section banner as a single record"""
+    logger.info(_BANNER_FORMAT, title)
+
+
+def _write_bytes(path: str, data: bytes) -> None:
+    """Write data to path atomically through a raw fd"""
+    tmp_path = path + ".tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, path)
+
+
+def _write_if_changed(path: str, obj: object) -> bool:
+    """
+    Serialize obj as indented JSON, mapping proxies included, and write it
+    unless the file already holds the same bytes, as recorded by a blake2b
+    sidecar (<path>.hash)
+    """
+    if orjson is not None:
+        data = orjson.dumps(obj, default=dict, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+    else:
+        data = (json.dumps(obj, default=dict, indent=2) + "\n").encode()
+    
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest().encode()
+    hash_path = path + ".hash"
+    try:
+        with open(hash_path, 'rb') as f:
+            if f.read() == digest and os.path.exists(path):
+                return False
+    except FileNotFoundError:
+        pass
+    
+    _write_bytes(path, data)
+    _write_bytes(hash_path, digest)
+    return True
+
+
+class IntegrationSpec(TypedDict, total=False):
+    status: str
+    api_endpoints: list[str]
+    features: list[str]
+    sources: list[str]
+    data_types: list[str]
+    counties_covered: list[str]
+    data_points: list[str]
+    platforms: list[str]
+    implementation: str
+
+
+DataSources = Mapping[str, IntegrationSpec]
+
+
+class AIFeatureSpec(TypedDict, total=False):
+    status: str
+    model: str
+    capabilities: list[str]
+    predictions: list[str]
+    applications: list[str]
+    accuracy: str
+    training_episodes: int
+    win_rate: str
+    implementation: str
+
+
+AIFeatures = Mapping[str, AIFeatureSpec]
+
+
+class AutomationSpec(TypedDict, total=False):
+    status: str
+    features: list[str]
+    templates: int
+    generation_time: str
+    integrations: list[str]
+    channels: list[str]
+    cadence: list[str]
+    personalization: str
+    platforms: list[str]
+    auto_updates: list[str]
+    sync_frequency: str
+    implementation: str
+
+
+Automation = Mapping[str, AutomationSpec]
+
+
+# Static enhancement configurations, built once at import time and shared
+# behind read-only proxies
+_INTEGRATIONS: DataSources = MappingProxyType({
+    "mls_integration": {
+        "status": "configured",
+        "api_endpoints": [
+            "https://api.mlsgrid.com/v2/",
+            "https://api.bridgedataoutput.com/api/v2/"
+        ],
+        "features": [
+            "Real-time MLS listings",
+            "Historical sales data",
+            "Property details and photos",
+            "Agent contact information"
+        ],
+        "implementation": "scripts/integrations/mls_scraper.py"
+    },
+
+    "public_records": {
+        "status": "configured",
+        "sources": [
+            "ATTOM Data Solutions API",
+            "CoreLogic API",
+            "PropertyInfo API",
+            "County clerk websites"
+        ],
+        "data_types": [
+            "Ownership history",
+            "Liens and judgments",
+            "Tax assessments",
+            "Building permits"
+        ],
+        "implementation": "scripts/integrations/public_records.py"
+    },
+
+    "county_assessor": {
+        "status": "configured",
+        "counties_covered": [
+            "Brevard County, FL",
+            "Broward County, FL",
+            "Indian River County, FL",
+            "St. Lucie County, FL",
+            "Martin County, FL",
+            "Palm Beach County, FL",
+            "Okeechobee County, FL"
+        ],
+        "data_points": [
+            "Property valuations",
+            "Tax payment history",
+            "Exemptions and appeals",
+            "Parcel information"
+        ],
+        "implementation": "scripts/integrations/county_assessor.py"
+    },
+
+    "auction_sites": {
+        "status": "configured",
+        "platforms": [
+            "Auction.com",
+            "Foreclosure.com",
+            "RealtyBid",
+            "Hubzu"
+        ],
+        "features": [
+            "Live auction tracking",
+            "Pre-foreclosure alerts",
+            "Auction results history",
+            "Bid analysis"
+        ],
+        "implementation": "scripts/integrations/auction_scraper.py"
+    }
+})
+
+_AI_FEATURES: AIFeatures = MappingProxyType({
+    "computer_vision": {
+        "status": "implemented",
+        "model": "Vertex AI Vision API",
+        "capabilities": [
+            "Property condition assessment",
+            "Exterior damage detection",
+            "Interior quality scoring",
+            "Renovation cost estimation",
+            "Comparable property matching"
+        ],
+        "accuracy": "94%",
+        "implementation": "scripts/ai/computer_vision.py"
+    },
+
+    "nlp_analysis": {
+        "status": "implemented",
+        "model": "Vertex AI Gemini 2.5 Flash",
+        "capabilities": [
+            "Property description analysis",
+            "Legal document parsing",
+            "Sentiment analysis on listings",
+            "Owner communication analysis",
+            "Contract risk assessment"
+        ],
+        "accuracy": "96%",
+        "implementation": "scripts/ai/nlp_processor.py"
+    },
+
+    "time_series_forecasting": {
+        "status": "implemented",
+        "model": "Vertex AI AutoML + Prophet",
+        "predictions": [
+            "Property value forecasts (6, 12, 24 months)",
+            "Market trend predictions",
+            "Days-on-market estimation",
+            "Optimal listing timing",
+            "Seasonal price variations"
+        ],
+        "accuracy": "89%",
+        "implementation": "scripts/ai/time_series.py"
+    },
+
+    "reinforcement_learning": {
+        "status": "implemented",
+        "model": "Custom RL Agent (PPO)",
+        "applications": [
+            "Negotiation strategy optimization",
+            "Bid amount recommendations",
+            "Counter-offer generation",
+            "Deal structure optimization",
+            "Risk-reward balancing"
+        ],
+        "training_episodes": 100000,
+        "win_rate": "78%",
+        "implementation": "scripts/ai/rl_negotiator.py"
+    }
+})
+
+_AUTOMATION: Automation = MappingProxyType({
+    "offer_letter_generator": {
+        "status": "operational",
+        "features": [
+            "Personalized offer letters",
+            "Legal compliance checking",
+            "Dynamic pricing based on analysis",
+            "Multiple template options",
+            "E-signature integration"
+        ],
+        "templates": 12,
+        "generation_time": "< 30 seconds",
+        "implementation": "scripts/automation/offer_generator.py"
+    },
+
+    "viewing_scheduler": {
+        "status": "operational",
+        "integrations": [
+            "Google Calendar API",
+            "Calendly API",
+            "SMS notifications (Twilio)",
+            "Email reminders (SendGrid)"
+        ],
+        "features": [
+            "Auto-schedule with agents",
+            "Conflict detection",
+            "Route optimization",
+            "Automatic rescheduling",
+            "Confirmation tracking"
+        ],
+        "implementation": "scripts/automation/viewing_scheduler.py"
+    },
+
+    "follow_up_system": {
+        "status": "operational",
+        "channels": [
+            "Email (SendGrid)",
+            "SMS (Twilio)",
+            "Phone calls (AI voice)",
+            "WhatsApp Business API"
+        ],
+        "cadence": [
+            "Day 1: Initial contact",
+            "Day 3: First follow-up",
+            "Day 7: Second follow-up",
+            "Day 14: Third follow-up",
+            "Day 30: Final follow-up"
+        ],
+        "personalization": "AI-generated based on interaction history",
+        "implementation": "scripts/automation/follow_up.py"
+    },
+
+    "crm_integration": {
+        "status": "operational",
+        "platforms": [
+            "Salesforce",
+            "HubSpot",
+            "Pipedrive",
+            "Zoho CRM"
+        ],
+        "auto_updates": [
+            "Lead status changes",
+            "Property analysis results",
+            "Communication logs",
+            "Deal progress tracking",
+            "Task assignments"
+        ],
+        "sync_frequency": "Real-time",
+        "implementation": "scripts/automation/crm_sync.py"
+    }
+})
+
 
 class SystemEnhancements:
     """Complete system enhancements for Lead Sniper"""
     
-    def __init__(self):
+    # Output directories already created by this process
+    _made_dirs: set[str] = set()
+    
+    def __init__(self, split: bool = False):
+        self.split = split
+        from pathlib import Path
+        
         self.project_root = Path("/home/ubuntu/lead-sniper")
         self.enhancements_dir = self.project_root / "enhancements"
-        self.enhancements_dir.mkdir(exist_ok=True)
+        enhancements_dir = str(self.enhancements_dir)
+        if enhancements_dir not in SystemEnhancements._made_dirs:
+            os.makedirs(enhancements_dir, exist_ok=True)
+            SystemEnhancements._made_dirs.add(enhancements_dir)
+        self._dir = enhancements_dir + os.sep
+        
+        self._now = datetime.now()
+        self.execution_id = self._now.strftime("%Y%m%d_%H%M%S")
+        self._timestamp_iso = self._now.isoformat()
+        
+        # Output paths are fixed for the lifetime of the instance
+        eid = self.execution_id
+        self._bundle_path = self._dir + f"bundle_{eid}.json"
+        self._paths = (
+            self._dir + f"data_sources_config_{eid}.json",
+            self._dir + f"ai_features_config_{eid}.json",
+            self._dir + f"automation_config_{eid}.json",
+            self._dir + f"enhancement_summary_{eid}.json"
+        )
         
-        self.execution_id = datetime.now().strftime("%Y%m%d_%H%M%S")
         logger.info(f"🚀 System Enhancements Initialized: {self.execution_id}")
     
-    def enhancement_1_data_sources(self) -> Dict[str, Any]:
+    def enhancement_1_data_sources(self) -> DataSources:
         """
         Enhancement 1: Advanced Data Source Integrations
         - MLS integration
@@ -41,85 +371,7 @@ class SystemEnhancements:
         - County assessor databases
         - Auction.com and foreclosure.com
         """
-        logger.info("\n" + "="*80)
-        logger.info("📊 ENHANCEMENT 1: DATA SOURCE INTEGRATIONS")
-        logger.info("="*80)
-        
-        integrations = {
-            "mls_integration": {
-                "status": "configured",
-                "api_endpoints": [
-                    "https://api.mlsgrid.com/v2/",
-                    "https://api.bridgedataoutput.com/api/v2/"
-                ],
-                "features": [
-                    "Real-time MLS listings",
-                    "Historical sales data",
-                    "Property details and photos",
-                    "Agent contact information"
-                ],
-                "implementation": "scripts/integrations/mls_scraper.py"
-            },
-            
-            "public_records": {
-                "status": "configured",
-                "sources": [
-                    "ATTOM Data Solutions API",
-                    "CoreLogic API",
-                    "PropertyInfo API",
-                    "County clerk websites"
-                ],
-                "data_types": [
-                    "Ownership history",
-                    "Liens and judgments",
-                    "Tax assessments",
-                    "Building permits"
-                ],
-                "implementation": "scripts/integrations/public_records.py"
-            },
-            
-            "county_assessor": {
-                "status": "configured",
-                "counties_covered": [
-                    "Brevard County, FL",
-                    "Broward County, FL",
-                    "Indian River County, FL",
-                    "St. Lucie County, FL",
-                    "Martin County, FL",
-                    "Palm Beach County, FL",
-                    "Okeechobee County, FL"
-                ],
-                "data_points": [
-                    "Property valuations",
-                    "Tax payment history",
-                    "Exemptions and appeals",
-                    "Parcel information"
-                ],
-                "implementation": "scripts/integrations/county_assessor.py"
-            },
-            
-            "auction_sites": {
-                "status": "configured",
-                "platforms": [
-                    "Auction.com",
-                    "Foreclosure.com",
-                    "RealtyBid",
-                    "Hubzu"
-                ],
-                "features": [
-                    "Live auction tracking",
-                    "Pre-foreclosure alerts",
-                    "Auction results history",
-                    "Bid analysis"
-                ],
-                "implementation": "scripts/integrations/auction_scraper.py"
-            }
-        }
-        
-        # Save configuration
-        config_file = self.enhancements_dir / f"data_sources_config_{self.execution_id}.json"
-        with open(config_file, 'w') as f:
-            json.dump(integrations, f, indent=2)
+        _banner("📊 ENHANCEMENT 1: DATA SOURCE INTEGRATIONS")
         
         logger.info(f"✅ Data Source Integrations Configured")
         logger.info(f"   - MLS Integration: Ready")
@@ -127,9 +379,9 @@ class SystemEnhancements:
         logger.info(f"   - County Assessor: 7 counties")
         logger.info(f"   - Auction Sites: 4 platforms")
         
-        return integrations
+        return _INTEGRATIONS
     
-    def enhancement_2_advanced_ai(self) -> Dict[str, Any]:
+    def enhancement_2_advanced_ai(self) -> AIFeatures:
         """
         Enhancement 2: Advanced AI Features
         - Computer vision for property condition
@@ -137,73 +389,7 @@ class SystemEnhancements:
         - Time series forecasting
         - Reinforcement learning for negotiations
         """
-        logger.info("\n" + "="*80)
-        logger.info("🤖 ENHANCEMENT 2: ADVANCED AI FEATURES")
-        logger.info("="*80)
-        
-        ai_features = {
-            "computer_vision": {
-                "status": "implemented",
-                "model": "Vertex AI Vision API",
-                "capabilities": [
-                    "Property condition assessment",
-                    "Exterior damage detection",
-                    "Interior quality scoring",
-                    "Renovation cost estimation",
-                    "Comparable property matching"
-                ],
-                "accuracy": "94%",
-                "implementation": "scripts/ai/computer_vision.py"
-            },
-            
-            "nlp_analysis": {
-                "status": "implemented",
-                "model": "Vertex AI Gemini 2.5 Flash",
-                "capabilities": [
-                    "Property description analysis",
-                    "Legal document parsing",
-                    "Sentiment analysis on listings",
-                    "Owner communication analysis",
-                    "Contract risk assessment"
-                ],
-                "accuracy": "96%",
-                "implementation": "scripts/ai/nlp_processor.py"
-            },
-            
-            "time_series_forecasting": {
-                "status": "implemented",
-                "model": "Vertex AI AutoML + Prophet",
-                "predictions": [
-                    "Property value forecasts (6, 12, 24 months)",
-                    "Market trend predictions",
-                    "Days-on-market estimation",
-                    "Optimal listing timing",
-                    "Seasonal price variations"
-                ],
-                "accuracy": "89%",
-                "implementation": "scripts/ai/time_series.py"
-            },
-            
-            "reinforcement_learning": {
-                "status": "implemented",
-                "model": "Custom RL Agent (PPO)",
-                "applications": [
-                    "Negotiation strategy optimization",
-                    "Bid amount recommendations",
-                    "Counter-offer generation",
-                    "Deal structure optimization",
-                    "Risk-reward balancing"
-                ],
-                "training_episodes": 100000,
-                "win_rate": "78%",
-                "implementation": "scripts/ai/rl_negotiator.py"
-            }
-        }
-        
-        # Save configuration
-        config_file = self.enhancements_dir / f"ai_features_config_{self.execution_id}.json"
-        with open(config_file, 'w') as f:
-            json.dump(ai_features, f, indent=2)
+        _banner("🤖 ENHANCEMENT 2: ADVANCED AI FEATURES")
         
         logger.info(f"✅ Advanced AI Features Implemented")
         logger.info(f"   - Computer Vision: 94% accuracy")
@@ -211,9 +397,9 @@ class SystemEnhancements:
         logger.info(f"   - Time Series: 89% accuracy")
         logger.info(f"   - RL Negotiator: 78% win rate")
         
-        return ai_features
+        return _AI_FEATURES
     
-    def enhancement_3_automation(self) -> Dict[str, Any]:
+    def enhancement_3_automation(self) -> Automation:
         """
         Enhancement 3: Complete Automation Suite
         - Auto-generate offer letters
@@ -221,86 +407,7 @@ class SystemEnhancements:
         - Auto-send follow-ups
         - Auto-update CRM
         """
-        logger.info("\n" + "="*80)
-        logger.info("⚡ ENHANCEMENT 3: AUTOMATION SUITE")
-        logger.info("="*80)
-        
-        automation = {
-            "offer_letter_generator": {
-                "status": "operational",
-                "features": [
-                    "Personalized offer letters",
-                    "Legal compliance checking",
-                    "Dynamic pricing based on analysis",
-                    "Multiple template options",
-                    "E-signature integration"
-                ],
-                "templates": 12,
-                "generation_time": "< 30 seconds",
-                "implementation": "scripts/automation/offer_generator.py"
-            },
-            
-            "viewing_scheduler": {
-                "status": "operational",
-                "integrations": [
-                    "Google Calendar API",
-                    "Calendly API",
-                    "SMS notifications (Twilio)",
-                    "Email reminders (SendGrid)"
-                ],
-                "features": [
-                    "Auto-schedule with agents",
-                    "Conflict detection",
-                    "Route optimization",
-                    "Automatic rescheduling",
-                    "Confirmation tracking"
-                ],
-                "implementation": "scripts/automation/viewing_scheduler.py"
-            },
-            
-            "follow_up_system": {
-                "status": "operational",
-                "channels": [
-                    "Email (SendGrid)",
-                    "SMS (Twilio)",
-                    "Phone calls (AI voice)",
-                    "WhatsApp Business API"
-                ],
-                "cadence": [
-                    "Day 1: Initial contact",
-                    "Day 3: First follow-up",
-                    "Day 7: Second follow-up",
-                    "Day 14: Third follow-up",
-                    "Day 30: Final follow-up"
-                ],
-                "personalization": "AI-generated based on interaction history",
-                "implementation": "scripts/automation/follow_up.py"
-            },
-            
-            "crm_integration": {
-                "status": "operational",
-                "platforms": [
-                    "Salesforce",
-                    "HubSpot",
-                    "Pipedrive",
-                    "Zoho CRM"
-                ],
-                "auto_updates": [
-                    "Lead status changes",
-                    "Property analysis results",
-                    "Communication logs",
-                    "Deal progress tracking",
-                    "Task assignments"
-                ],
-                "sync_frequency": "Real-time",
-                "implementation": "scripts/automation/crm_sync.py"
-            }
-        }
-        
-        # Save configuration
-        config_file = self.enhancements_dir / f"automation_config_{self.execution_id}.json"
-        with open(config_file, 'w') as f:
-            json.dump(automation, f, indent=2)
+        _banner("⚡ ENHANCEMENT 3: AUTOMATION SUITE")
         
         logger.info(f"✅ Automation Suite Operational")
         logger.info(f"   - Offer Letters: 12 templates, <30s generation")
@@ -308,39 +415,40 @@ class SystemEnhancements:
         logger.info(f"   - Follow-up System: 4 channels, 5-step cadence")
         logger.info(f"   - CRM Integration: 4 platforms, real-time sync")
         
-        return automation
+        return _AUTOMATION
     
-    def generate_enhancement_summary(self, integrations, ai_features, automation) -> str:
+    def generate_enhancement_summary(self, integrations: DataSources, ai_features: AIFeatures, automation: Automation) -> dict:
         """Generate comprehensive enhancement summary"""
-        logger.info("\n" + "="*80)
-        logger.info("📋 GENERATING ENHANCEMENT SUMMARY")
-        logger.info("="*80)
+        _banner("📋 GENERATING ENHANCEMENT SUMMARY")
         
         summary = {
             "execution_id": self.execution_id,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": self._timestamp_iso,
             "status": "ALL ENHANCEMENTS OPERATIONAL",
             
             "data_sources": {
-                "total_integrations": 4,
-                "mls_apis": 2,
-                "public_record_sources": 4,
-                "counties_covered": 7,
-                "auction_platforms": 4
+                "total_integrations": len(integrations),
+                "mls_apis": len(integrations["mls_integration"]["api_endpoints"]),
+                "public_record_sources": len(integrations["public_records"]["sources"]),
+                "counties_covered": len(integrations["county_assessor"]["counties_covered"]),
+                "auction_platforms": len(integrations["auction_sites"]["platforms"])
             },
             
             "ai_capabilities": {
-                "computer_vision_accuracy": "94%",
-                "nlp_accuracy": "96%",
-                "forecasting_accuracy": "89%",
-                "rl_win_rate": "78%"
+                "computer_vision_accuracy": ai_features["computer_vision"]["accuracy"],
+                "nlp_accuracy": ai_features["nlp_analysis"]["accuracy"],
+                "forecasting_accuracy": ai_features["time_series_forecasting"]["accuracy"],
+                "rl_win_rate": ai_features["reinforcement_learning"]["win_rate"]
             },
             
             "automation": {
-                "offer_letter_templates": 12,
-                "scheduling_integrations": 2,
-                "follow_up_channels": 4,
-                "crm_platforms": 4
+                "offer_letter_templates": automation["offer_letter_generator"]["templates"],
+                # Calendar APIs only; SMS/email reminders are notification channels
+                "scheduling_integrations": sum(
+                    1 for i in automation["viewing_scheduler"]["integrations"] if i.endswith(" API")
+                ),
+                "follow_up_channels": len(automation["follow_up_system"]["channels"]),
+                "crm_platforms": len(automation["crm_integration"]["platforms"])
             },
             
             "investor_highlights": [
@@ -363,48 +471,61 @@ class SystemEnhancements:
             ]
         }
         
-        summary_file = self.enhancements_dir / f"enhancement_summary_{self.execution_id}.json"
-        with open(summary_file, 'w') as f:
-            json.dump(summary, f, indent=2)
+        logger.info("✅ Enhancement Summary Generated")
         
-        logger.info(f"✅ Enhancement Summary Generated: {summary_file}")
+        return summary
+    
+    def write_outputs(self, integrations, ai_features, automation, summary) -> str:
+        """Write all enhancement outputs, as one bundle or as per-section files"""
+        if not self.split:
+            _write_if_changed(self._bundle_path, {
+                "data_sources": integrations,
+                "ai": ai_features,
+                "automation": automation,
+                "summary": summary
+            })
+            return self._bundle_path
         
-        return str(summary_file)
+        _write_if_changed(self._paths[0], integrations)
+        _write_if_changed(self._paths[1], ai_features)
+        _write_if_changed(self._paths[2], automation)
+        _write_if_changed(self._paths[3], summary)
+        return self._paths[3]
     
     def execute(self) -> bool:
         """Execute all system enhancements"""
-        try:
-            logger.info("\n" + "="*80)
-            logger.info("🚀 LEAD SNIPER - SYSTEM ENHANCEMENTS")
-            logger.info("="*80)
-            logger.info(f"Execution ID: {self.execution_id}")
-            logger.info("="*80 + "\n")
-            
-            # Execute all enhancements
-            integrations = self.enhancement_1_data_sources()
-            ai_features = self.enhancement_2_advanced_ai()
-            automation = self.enhancement_3_automation()
-            summary_file = self.generate_enhancement_summary(integrations, ai_features, automation)
-            
-            logger.info("\n" + "="*80)
-            logger.info("✅ ALL SYSTEM ENHANCEMENTS COMPLETE")
-            logger.info("="*80)
-            logger.info(f"Summary: {summary_file}")
-            logger.info("\n🎉 SYSTEM READY FOR INVESTOR DEMONSTRATION")
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"💥 Enhancement execution failed: {str(e)}")
-            import traceback
-            logger.error(traceback.format_exc())
-            return False
+        _banner("🚀 LEAD SNIPER - SYSTEM ENHANCEMENTS")
+        logger.info("Execution ID: %s", self.execution_id)
+        logger.info("%s\n", _BAR)
+        
+        # Execute all enhancements
+        integrations = self.enhancement_1_data_sources()
+        ai_features = self.enhancement_2_advanced_ai()
+        automation = self.enhancement_3_automation()
+        summary = self.generate_enhancement_summary(integrations, ai_features, automation)
+        summary_file = self.write_outputs(integrations, ai_features, automation, summary)
+        
+        _banner("✅ ALL SYSTEM ENHANCEMENTS COMPLETE")
+        logger.info("Summary: %s", summary_file)
+        logger.info("\n🎉 SYSTEM READY FOR INVESTOR DEMONSTRATION")
+        
+        return True
 
 
 def main():
     """Main entry point"""
-    enhancements = SystemEnhancements()
-    success = enhancements.execute()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Lead Sniper System Enhancements')
+    parser.add_argument('--split', action='store_true', help='Write one JSON file per section instead of a single bundle')
+    
+    args = parser.parse_args()
+    
+    try:
+        success = SystemEnhancements(split=args.split).execute()
+    except Exception:
+        logger.exception("💥 Enhancement execution failed")
+        sys.exit(1)
     sys.exit(0 if success else 1)
 
 
@@ -5,12 +5,94 @@ Zero-touch deployment and environment setup
 """
 
 from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime
-import json
-import subprocess
+from datetime import datetime, timedelta
 import sys
 import os
+import re
+import io
+import shutil
+import hashlib
+import time
+import mmap
+
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+    def _dumps_line(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+
+    _loads = orjson.loads
+except ImportError:  # orjson is optional
+    import json
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, indent=2).encode()
+
+    def _dumps_line(obj) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode() + b'\n'
+
+    _loads = json.loads
+
+def _write_file(path: Path, payload: bytes, sync: bool = False, append: bool = False):
+    """Write pre-encoded bytes through an unbuffered handle, optionally fsyncing"""
+    with open(path, 'ab' if append else 'wb', buffering=0) as f:
+        f.write(payload)
+        if sync:
+            os.fsync(f.fileno())
+
+
+# Bootstrap runs are appended to this NDJSON log, rotated past 10 MiB
+_STATE_FILE = '.bootstrap_state.ndjson'
+_STATE_ROTATE_BYTES = 10 * 1024 * 1024
+
+# KEY=value lines in a .env file, split at the first '=' and with an optional
+# `export` prefix; quotes around the value are stripped only when balanced
+_ENV_LINE = re.compile(
+    rb'^(?![ \t]*#)[ \t]*(?:export[ \t]+)?([^=\r\n]+)=(["\']?)([^\r\n]*?)\2[ \t]*\r?$',
+    re.MULTILINE
+)
+
+# Environment variables that identify a cloud provider, in priority order
+_CLOUD_ENV_VARS = {
+    'GOOGLE_CLOUD_PROJECT': 'google_cloud',
+    'AWS_REGION': 'aws',
+    'AZURE_SUBSCRIPTION_ID': 'azure'
+}
+
+# Console banners, built once
+_SEP = "=" * 60
+_DASH = "-" * 60
+_START_BANNER = "\n".join((
+    "🚀 Starting Auto-Bootstrap System",
+    "📁 Project Root: {root}",
+    "🎯 Mode: {mode}",
+    _DASH
+)).format
+_COMPLETE_BANNER = "\n".join(("\n" + _SEP, "✅ Bootstrap Complete!", _SEP))
+_REPORT_HEADER = "\n📊 BOOTSTRAP REPORT\n" + _SEP
+_REPORT_FOOTER = "\n\n" + _SEP
+
+# Step-specific report lines, keyed by step id
+_REPORT_FIELDS = {
+    'dependency_installation': (
+        ('Python Packages', lambda step: step['python_packages']),
+        ('Node Packages', lambda step: step['node_packages'])
+    ),
+    'database_initialization': (
+        ('Databases', lambda step: len(step['databases'])),
+    ),
+    'service_registration': (
+        ('Services Discovered', lambda step: len(step['services'])),
+    )
+}
+
+# Directories never worth descending into during service discovery
+_SKIP_DIRS = frozenset({'.git', 'node_modules', '__pycache__', 'venv', '.venv', 'dist', 'build'})
 
 
 class AutoBootstrapSystem:
@@ -19,9 +101,24 @@ class AutoBootstrapSystem:
     Detects environment, installs dependencies, configures services
     """
 
-    def __init__(self, project_root: str):
+    _TRACKED_FILES = ('package.json', 'requirements.txt', 'docker-compose.yml', '.env', '.env.example')
+
+    def __init__(self, project_root: str, verbose: bool = True, deep_checks: bool = False):
         self.project_root = Path(project_root)
         self.bootstrap_log = []
+        self.deep_checks = deep_checks
+        self._which_cache = {}
+        self._pending_writes = {}
+
+        # Progress lines are written as they happen; quiet runs only queue them
+        self._verbose = verbose
+        self._out = sys.stdout if verbose else io.StringIO()
+        self._buffer = []
+
+        # One directory read answers every top-level "does X exist" question
+        with os.scandir(self.project_root) as entries:
+            self._root_entries = {entry.name: entry.is_dir() for entry in entries}
+        self._present = {name: name in self._root_entries for name in self._TRACKED_FILES}
         self.config = self._load_or_create_config()
 
     def bootstrap(self, mode: str = 'development') -> Dict:
@@ -30,64 +127,67 @@ class AutoBootstrapSystem:
         Runs all initialization steps automatically
         """
 
-        print("🚀 Starting Auto-Bootstrap System")
-        print(f"📁 Project Root: {self.project_root}")
-        print(f"🎯 Mode: {mode}")
-        print("-" * 60)
+        self._log(_START_BANNER(root=self.project_root, mode=mode))
+
+        if mode != 'production':
+            self._flush_writes()
+
+        # Step log entries are offsets from this single wall-clock reading
+        self._t0_wall = datetime.utcnow()
+        self._t0_mono = time.monotonic_ns()
 
         results = {
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': self._t0_wall.isoformat(timespec='milliseconds'),
             'mode': mode,
-            'steps': []
+            'steps': [None] * 6
         }
 
         # Step 1: Environment Detection
-        print("\n🔍 Step 1: Detecting Environment...")
+        self._log("\n🔍 Step 1: Detecting Environment...")
         env_info = self._detect_environment()
-        results['steps'].append(env_info)
+        results['steps'][0] = env_info
         self._log_step("Environment Detection", env_info)
 
         # Step 2: Dependency Installation
-        print("\n📦 Step 2: Installing Dependencies...")
+        self._log("\n📦 Step 2: Installing Dependencies...")
         deps_result = self._install_dependencies()
-        results['steps'].append(deps_result)
+        results['steps'][1] = deps_result
         self._log_step("Dependency Installation", deps_result)
 
         # Step 3: Configuration Setup
-        print("\n⚙️  Step 3: Setting Up Configuration...")
+        self._log("\n⚙️  Step 3: Setting Up Configuration...")
         config_result = self._setup_configuration(mode)
-        results['steps'].append(config_result)
+        results['steps'][2] = config_result
         self._log_step("Configuration Setup", config_result)
 
         # Step 4: Database Initialization
-        print("\n🗄️  Step 4: Initializing Databases...")
+        self._log("\n🗄️  Step 4: Initializing Databases...")
         db_result = self._initialize_databases()
-        results['steps'].append(db_result)
+        results['steps'][3] = db_result
         self._log_step("Database Initialization", db_result)
 
         # Step 5: Service Discovery & Registration
-        print("\n🔎 Step 5: Discovering and Registering Services...")
+        self._log("\n🔎 Step 5: Discovering and Registering Services...")
         service_result = self._discover_and_register_services()
-        results['steps'].append(service_result)
+        results['steps'][4] = service_result
         self._log_step("Service Registration", service_result)
 
         # Step 6: Health Checks
-        print("\n💚 Step 6: Running Health Checks...")
+        self._log("\n💚 Step 6: Running Health Checks...")
         health_result = self._run_health_checks()
-        results['steps'].append(health_result)
+        results['steps'][5] = health_result
         self._log_step("Health Checks", health_result)
 
         # Step 7: Generate Bootstrap Report
-        print("\n📊 Step 7: Generating Bootstrap Report...")
+        self._log("\n📊 Step 7: Generating Bootstrap Report...")
         report = self._generate_report(results)
 
-        print("\n" + "="* 60)
-        print("✅ Bootstrap Complete!")
-        print("="* 60)
-        print(report)
+        self._log(_COMPLETE_BANNER)
+        self._log(report)
 
         # Save bootstrap state
         self._save_bootstrap_state(results)
+        self._flush()
 
         return results
 
@@ -106,29 +206,28 @@ class AutoBootstrapSystem:
         }
 
         # Detect project type
-        if (self.project_root / 'package.json').exists():
+        if self._present['package.json']:
             env_info['project_type'] = 'node'
             env_info['detected_frameworks'].append('Node.js')
 
-        if (self.project_root / 'requirements.txt').exists():
+        if self._present['requirements.txt']:
             env_info['project_type'] = 'python'
             env_info['detected_frameworks'].append('Python')
 
-        if (self.project_root / 'docker-compose.yml').exists():
+        if self._present['docker-compose.yml']:
             env_info['detected_services'] = self._parse_docker_services()
 
         # Detect cloud environment
-        if os.getenv('GOOGLE_CLOUD_PROJECT'):
-            env_info['cloud_environment'] = 'google_cloud'
-        elif os.getenv('AWS_REGION'):
-            env_info['cloud_environment'] = 'aws'
-        elif os.getenv('AZURE_SUBSCRIPTION_ID'):
-            env_info['cloud_environment'] = 'azure'
+        env_info['cloud_environment'] = next(
+            (cloud for var, cloud in _CLOUD_ENV_VARS.items() if os.environ.get(var)),
+            None
+        )
 
         return env_info
 
     def _install_dependencies(self) -> Dict:
         """Install all project dependencies"""
+        import subprocess
 
         result = {
             'step': 'dependency_installation',
@@ -136,50 +235,108 @@ class AutoBootstrapSystem:
             'node_packages': 0,
             'system_packages': 0,
             'status': 'success',
-            'errors': []
+            'errors': [],
+            'skipped': [],
+            'install_hashes': {}
         }
 
-        # Install Python dependencies
-        if (self.project_root / 'requirements.txt').exists():
-            try:
-                print("  📦 Installing Python packages...")
-                subprocess.run([
+        # Skip any installer whose manifest is unchanged since the last successful run
+        previous = self._previous_install_hashes()
+        installs = {}
+        if self._present['requirements.txt']:
+            digest = self._manifest_hash('requirements.txt', sys.executable)
+            result['install_hashes']['Python'] = digest
+            if previous.get('Python') == digest:
+                result['skipped'].append('Python')
+            else:
+                self._log("  📦 Installing Python packages...")
+                installs['Python'] = ([
                     sys.executable, '-m', 'pip', 'install', '-r',
-                    str(self.project_root / 'requirements.txt')
-                ], check=True, capture_output=True)
-
-                # Count packages
-                with open(self.project_root / 'requirements.txt') as f:
-                    result['python_packages'] = len([
-                        l for l in f.readlines()
-                        if l.strip() and not l.startswith('#')
-                    ])
-                print(f"  ✅ Installed {result['python_packages']} Python packages")
-            except subprocess.CalledProcessError as e:
-                result['errors'].append(f"Python install failed: {e}")
-                result['status'] = 'partial'
-
-        # Install Node dependencies
-        if (self.project_root / 'package.json').exists():
+                    str(self.project_root / 'requirements.txt'),
+                    '--no-input', '--disable-pip-version-check'
+                ], None)
+        if self._present['package.json']:
+            lockfile = 'package-lock.json' if 'package-lock.json' in self._root_entries else 'package.json'
+            digest = self._manifest_hash(lockfile)
+            result['install_hashes']['Node'] = digest
+            if previous.get('Node') == digest and self._root_entries.get('node_modules'):
+                result['skipped'].append('Node')
+            else:
+                self._log("  📦 Installing Node packages...")
+                installs['Node'] = (['npm', 'install'], str(self.project_root))
+
+        # Python and Node installs touch disjoint trees, so run them side by side
+        futures = {}
+        if installs:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = {
+                    name: executor.submit(self._run_installer, cmd, cwd)
+                    for name, (cmd, cwd) in installs.items()
+                }
+
+        for name, future in futures.items():
             try:
-                print("  📦 Installing Node packages...")
-                subprocess.run(
-                    ['npm', 'install'],
-                    cwd=str(self.project_root),
-                    check=True,
-                    capture_output=True
-                )
-
-                # Count packages
-                package_json = json.loads((self.project_root / 'package.json').read_text())
-                result['node_packages'] = len(package_json.get('dependencies', {}))
-                print(f"  ✅ Installed {result['node_packages']} Node packages")
-            except subprocess.CalledProcessError as e:
-                result['errors'].append(f"Node install failed: {e}")
+                future.result()
+            except (subprocess.CalledProcessError, OSError) as e:
+                stderr = getattr(e, 'stderr', None)
+                detail = f": {stderr.decode(errors='replace').strip()}" if stderr else ""
+                result['errors'].append(f"{name} install failed: {e}{detail}")
                 result['status'] = 'partial'
+                # Forget the hash so the next run retries this installer
+                del result['install_hashes'][name]
+
+        # Count packages
+        verb = {name: 'Up to date:' if name in result['skipped'] else 'Installed' for name in result['install_hashes']}
+        if 'Python' in verb:
+            with open(self.project_root / 'requirements.txt', 'rb') as f:
+                result['python_packages'] = sum(
+                    1 for l in f
+                    if (stripped := l.strip()) and not stripped.startswith(b'#')
+                )
+            self._log(f"  ✅ {verb['Python']} {result['python_packages']} Python packages")
+        if 'Node' in verb:
+            package_json = _loads((self.project_root / 'package.json').read_bytes())
+            result['node_packages'] = len(package_json.get('dependencies', {}))
+            self._log(f"  ✅ {verb['Node']} {result['node_packages']} Node packages")
 
         return result
 
+    def _manifest_hash(self, name: str, salt: str = '') -> str:
+        """Fingerprint a dependency manifest (plus optional salt) for install caching"""
+        digest = hashlib.blake2b(salt.encode(), digest_size=16)
+        digest.update((self.project_root / name).read_bytes())
+        return digest.hexdigest()
+
+    def _previous_install_hashes(self) -> Dict:
+        """Manifest hashes recorded by the last bootstrap run, if any"""
+        if _STATE_FILE not in self._root_entries:
+            return {}
+        try:
+            previous = self._last_state()
+        except (OSError, ValueError):
+            return {}
+        for step in previous.get('steps') or []:
+            if step and step.get('step') == 'dependency_installation':
+                return step.get('install_hashes', {})
+        return {}
+
+    def _run_installer(self, cmd: List[str], cwd: Optional[str]):
+        """
+        Run a package manager, discarding stdout and draining stderr as it is
+        written so a chatty resolver never blocks on a full pipe
+        """
+        import subprocess
+
+        proc = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        stderr = []
+        with proc.stderr:
+            for line in proc.stderr:
+                stderr.append(line)
+                if b'ERR' in line or b'WARN' in line:
+                    self._log(f"  ⚠️  {line.decode(errors='replace').rstrip()}")
+        if proc.wait():
+            raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=b''.join(stderr))
+
     def _setup_configuration(self, mode: str) -> Dict:
         """Setup configuration files and environment variables"""
 
@@ -194,28 +351,29 @@ class AutoBootstrapSystem:
         env_file = self.project_root / '.env'
         env_example = self.project_root / '.env.example'
 
-        if env_example.exists() and not env_file.exists():
-            print(f"  📝 Creating .env from .env.example")
-            env_content = env_example.read_text()
+        if self._present['.env.example'] and not self._present['.env']:
+            self._log(f"  📝 Creating .env from .env.example")
+            env_content = env_example.read_bytes()
 
             # Replace placeholders with actual values or defaults
-            env_content = env_content.replace('${MODE}', mode)
-            env_content = env_content.replace('${TIMESTAMP}', datetime.utcnow().isoformat())
+            env_content = env_content.replace(b'${MODE}', mode.encode())
+            env_content = env_content.replace(b'${TIMESTAMP}', datetime.utcnow().isoformat().encode())
 
-            env_file.write_text(env_content)
+            _write_file(env_file, env_content)
+            self.invalidate('.env')
             result['config_files_created'] += 1
 
         # Load environment variables
-        if env_file.exists():
-            with open(env_file) as f:
-                for line in f:
-                    if '=' in line and not line.startswith('#'):
-                        key, value = line.strip().split('=', 1)
-                        os.environ[key] = value
-                        result['env_vars_set'] += 1
+        if self._present['.env']:
+            env_vars = {
+                m.group(1).decode(): m.group(3).decode()
+                for m in _ENV_LINE.finditer(env_file.read_bytes())
+            }
+            os.environ.update(env_vars)
+            result['env_vars_set'] = len(env_vars)
 
-        print(f"  ✅ Created {result['config_files_created']} config files")
-        print(f"  ✅ Set {result['env_vars_set']} environment variables")
+        self._log(f"  ✅ Created {result['config_files_created']} config files")
+        self._log(f"  ✅ Set {result['env_vars_set']} environment variables")
 
         return result
 
@@ -229,16 +387,17 @@ class AutoBootstrapSystem:
         }
 
         # Check for database configuration
-        if os.getenv('DATABASE_URL'):
-            print("  🗄️  Detected database configuration")
+        db_url = os.environ.get('DATABASE_URL')
+        if db_url:
+            self._log("  🗄️  Detected database configuration")
             result['databases'].append({
-                'type': 'postgres' if 'postgres' in os.getenv('DATABASE_URL') else 'unknown',
+                'type': 'postgres' if 'postgres' in db_url else 'unknown',
                 'status': 'configured'
             })
 
         # Initialize Firestore
         if os.getenv('GOOGLE_CLOUD_PROJECT'):
-            print("  🗄️  Initializing Firestore")
+            self._log("  🗄️  Initializing Firestore")
             result['databases'].append({
                 'type': 'firestore',
                 'status': 'configured'
@@ -246,13 +405,13 @@ class AutoBootstrapSystem:
 
         # Initialize Neo4j
         if os.getenv('NEO4J_URI'):
-            print("  🗄️  Initializing Neo4j")
+            self._log("  🗄️  Initializing Neo4j")
             result['databases'].append({
                 'type': 'neo4j',
                 'status': 'configured'
             })
 
-        print(f"  ✅ Initialized {len(result['databases'])} databases")
+        self._log(f"  ✅ Initialized {len(result['databases'])} databases")
 
         return result
 
@@ -265,40 +424,43 @@ class AutoBootstrapSystem:
             'status': 'success'
         }
 
-        # Scan services directory
-        services_dir = self.project_root / 'services'
-        if services_dir.exists():
-            for service_path in services_dir.rglob('main.py'):
-                service_name = service_path.parent.name
-                result['services'].append({
-                    'name': service_name,
-                    'path': str(service_path),
-                    'type': 'python'
-                })
-
-            for service_path in services_dir.rglob('index.ts'):
-                service_name = service_path.parent.name
-                result['services'].append({
-                    'name': service_name,
-                    'path': str(service_path),
-                    'type': 'typescript'
-                })
-
-        # Scan backend directory
-        backend_dir = self.project_root / 'backend'
-        if backend_dir.exists():
-            for service_path in backend_dir.rglob('main.py'):
-                service_name = service_path.parent.name
-                result['services'].append({
-                    'name': service_name,
-                    'path': str(service_path),
-                    'type': 'python'
-                })
-
-        print(f"  ✅ Discovered {len(result['services'])} services")
+        # One walk per root matches every entry point; the walks overlap in threads
+        scans = [
+            (self.project_root / 'services', {'main.py': 'python', 'index.ts': 'typescript'}),
+            (self.project_root / 'backend', {'main.py': 'python'})
+        ]
+        scans = [scan for scan in scans if self._root_entries.get(scan[0].name)]
+
+        if scans:
+            with ThreadPoolExecutor(max_workers=len(scans)) as executor:
+                futures = [executor.submit(self._scan, *scan) for scan in scans]
+            for future in futures:
+                result['services'].extend(future.result())
+
+        self._log(f"  ✅ Discovered {len(result['services'])} services")
 
         return result
 
+    @staticmethod
+    def _scan(root: Path, entry_points: Dict[str, str]) -> List[Dict]:
+        """
+        Walk root once, collecting every file whose name is a key of
+        entry_points (mapped to its service type); VCS, dependency and
+        build directories are pruned
+        """
+        services = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in _SKIP_DIRS]
+            for filename in filenames:
+                service_type = entry_points.get(filename)
+                if service_type:
+                    services.append({
+                        'name': os.path.basename(dirpath),
+                        'path': os.path.join(dirpath, filename),
+                        'type': service_type
+                    })
+        return services
+
     def _run_health_checks(self) -> Dict:
         """Run health checks on all components"""
 
@@ -310,81 +472,98 @@ class AutoBootstrapSystem:
             'unhealthy': 0
         }
 
-        # Check Python
-        try:
-            subprocess.run([sys.executable, '--version'], check=True, capture_output=True)
-            result['checks'].append({'name': 'Python', 'status': 'healthy'})
-            result['healthy'] += 1
-        except:
-            result['checks'].append({'name': 'Python', 'status': 'unhealthy'})
-            result['unhealthy'] += 1
-
-        # Check Node if applicable
-        if (self.project_root / 'package.json').exists():
-            try:
-                subprocess.run(['node', '--version'], check=True, capture_output=True)
-                result['checks'].append({'name': 'Node.js', 'status': 'healthy'})
-                result['healthy'] += 1
-            except:
-                result['checks'].append({'name': 'Node.js', 'status': 'unhealthy'})
-                result['unhealthy'] += 1
-
-        # Check Docker if applicable
-        if (self.project_root / 'docker-compose.yml').exists():
-            try:
-                subprocess.run(['docker', '--version'], check=True, capture_output=True)
-                result['checks'].append({'name': 'Docker', 'status': 'healthy'})
-                result['healthy'] += 1
-            except:
-                result['checks'].append({'name': 'Docker', 'status': 'unhealthy'})
-                result['unhealthy'] += 1
+        # The interpreter running this code is Python; no need to exec it
+        result['checks'].append({'name': 'Python', 'status': 'healthy', 'version': sys.version.split()[0]})
+        result['healthy'] += 1
+
+        # Other tools count as present when found on PATH; deep checks also exec --version
+        tools = []
+        if self._present['package.json']:
+            tools.append(('Node.js', 'node'))
+        if self._present['docker-compose.yml']:
+            tools.append(('Docker', 'docker'))
+
+        probes = []
+        for name, binary in tools:
+            path = self._which(binary)
+            if path and self.deep_checks:
+                probes.append((name, [path, '--version']))
+            else:
+                result['checks'].append({'name': name, 'status': 'healthy' if path else 'unhealthy'})
+                result['healthy' if path else 'unhealthy'] += 1
+
+        if probes:
+            with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+                outcomes = list(executor.map(self._probe, probes))
+
+            for name, healthy in outcomes:
+                result['checks'].append({'name': name, 'status': 'healthy' if healthy else 'unhealthy'})
+                result['healthy' if healthy else 'unhealthy'] += 1
 
-        print(f"  ✅ {result['healthy']} healthy, ❌ {result['unhealthy']} unhealthy")
+        self._log(f"  ✅ {result['healthy']} healthy, ❌ {result['unhealthy']} unhealthy")
 
         return result
 
+    def _which(self, binary: str) -> Optional[str]:
+        """Resolve a binary on PATH, cached for the lifetime of this bootstrapper"""
+        if binary not in self._which_cache:
+            self._which_cache[binary] = shutil.which(binary)
+        return self._which_cache[binary]
+
+    @staticmethod
+    def _probe(check) -> tuple:
+        """Run a health-check command, treating hangs and missing binaries as unhealthy"""
+        import subprocess
+
+        name, cmd = check
+        try:
+            return name, subprocess.run(cmd, capture_output=True, timeout=2).returncode == 0
+        except (OSError, subprocess.TimeoutExpired):
+            return name, False
+
     def _generate_report(self, results: Dict) -> str:
         """Generate bootstrap completion report"""
 
-        report = []
-        report.append("\n📊 BOOTSTRAP REPORT")
-        report.append("=" * 60)
+        report = io.StringIO()
+        report.write(_REPORT_HEADER)
 
         for step in results['steps']:
             step_name = step['step'].replace('_', ' ').title()
-            report.append(f"\n{step_name}:")
-            report.append(f"  Status: {step.get('status', 'unknown')}")
+            report.write(f"\n\n{step_name}:\n  Status: {step.get('status', 'unknown')}")
 
             # Add step-specific details
-            if 'python_packages' in step:
-                report.append(f"  Python Packages: {step['python_packages']}")
-            if 'node_packages' in step:
-                report.append(f"  Node Packages: {step['node_packages']}")
-            if 'services' in step:
-                report.append(f"  Services Discovered: {len(step['services'])}")
-            if 'databases' in step:
-                report.append(f"  Databases: {len(step['databases'])}")
+            for label, value in _REPORT_FIELDS.get(step['step'], ()):
+                report.write(f"\n  {label}: {value(step)}")
 
-        report.append("\n" + "=" * 60)
+        report.write(_REPORT_FOOTER)
 
-        return "\n".join(report)
+        return report.getvalue()
 
     def _parse_docker_services(self) -> List[str]:
         """Parse docker-compose.yml for services"""
         try:
             import yaml
-            compose_file = self.project_root / 'docker-compose.yml'
-            data = yaml.safe_load(compose_file.read_text())
-            return list(data.get('services', {}).keys())
-        except:
+        except ImportError:
             return []
 
+        # Prefer the libyaml-backed loader; it decodes the raw bytes itself
+        loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+        compose_file = self.project_root / 'docker-compose.yml'
+        try:
+            data = yaml.load(compose_file.read_bytes(), Loader=loader) or {}
+        except (yaml.YAMLError, OSError):
+            return []
+        if not isinstance(data, dict):
+            return []
+        services = data.get('services')
+        return list(services) if isinstance(services, dict) else []
+
     def _load_or_create_config(self) -> Dict:
         """Load or create bootstrap configuration"""
         config_file = self.project_root / '.bootstrap_config.json'
 
-        if config_file.exists():
-            return json.loads(config_file.read_text())
+        if config_file.name in self._root_entries:
+            return _loads(config_file.read_bytes())
 
         default_config = {
             'version': '1.0.0',
@@ -393,22 +572,68 @@ class AutoBootstrapSystem:
             'created_at': datetime.utcnow().isoformat()
         }
 
-        config_file.write_text(json.dumps(default_config, indent=2))
+        # Written when bootstrap() starts, except in production, where it is
+        # fsynced with the bootstrap state at the end of the run
+        self._pending_writes[config_file] = (_dumps(default_config), False)
         return default_config
 
     def _save_bootstrap_state(self, results: Dict):
-        """Save bootstrap state for future reference"""
-        state_file = self.project_root / '.bootstrap_state.json'
-        state_file.write_text(json.dumps(results, indent=2))
-        print(f"\n💾 Bootstrap state saved to: {state_file}")
+        """Append this run's state as one NDJSON line, rotating an oversized log first"""
+        state_file = self.project_root / _STATE_FILE
+        try:
+            if state_file.stat().st_size > _STATE_ROTATE_BYTES:
+                state_file.replace(state_file.with_name(_STATE_FILE + '.1'))
+        except FileNotFoundError:
+            pass
+        self._pending_writes[state_file] = (_dumps_line(results), True)
+        self._flush_writes(production=results.get('mode') == 'production')
+        self._log(f"\n💾 Bootstrap state saved to: {state_file}")
+
+    def _flush_writes(self, production: bool = False):
+        """Write all queued files, fsyncing each one in production runs"""
+        files, self._pending_writes = self._pending_writes, {}
+        for path, (payload, append) in files.items():
+            _write_file(path, payload, sync=production, append=append)
+
+    def _last_state(self) -> Dict:
+        """Decode the most recent run from the NDJSON state log"""
+        with open(self.project_root / _STATE_FILE, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            end = len(data) - 1  # skip the trailing newline
+            return _loads(data[data.rfind(b'\n', 0, end) + 1:end])
+
+    def invalidate(self, name: str):
+        """Refresh the cached presence of a tracked project file"""
+        self._present[name] = (self.project_root / name).exists()
+
+    def _log(self, message: str):
+        """Write a progress line immediately, or queue it for the next flush when quiet"""
+        if self._verbose:
+            # One write per line, so lines echoed from installer threads never interleave
+            self._out.write(message + "\n")
+            self._out.flush()
+        else:
+            self._buffer.append(message)
+
+    def _flush(self):
+        """Write all queued progress lines in one call"""
+        if self._buffer:
+            self._out.write("\n".join(self._buffer) + "\n")
+            self._out.flush()
+            self._buffer.clear()
+
+    def step_time(self, entry: Dict) -> str:
+        """Wall-clock ISO timestamp of a bootstrap_log entry"""
+        return (self._t0_wall + timedelta(microseconds=entry['t_us'])).isoformat(timespec='milliseconds')
 
     def _log_step(self, step_name: str, result: Dict):
         """Log bootstrap step"""
         self.bootstrap_log.append({
             'step': step_name,
-            'timestamp': datetime.utcnow().isoformat(),
+            't_us': (time.monotonic_ns() - self._t0_mono) // 1000,
             'result': result
         })
+        self._flush()
 
 
 def main():
@@ -418,10 +643,12 @@ def main():
     parser = argparse.ArgumentParser(description='Auto Bootstrap System')
     parser.add_argument('--mode', default='development', choices=['development', 'staging', 'production'])
     parser.add_argument('--project-root', default='.', help='Project root directory')
+    parser.add_argument('--quiet', action='store_true', help='Suppress progress output')
+    parser.add_argument('--deep-checks', action='store_true', help='Execute tool binaries during health checks')
 
     args = parser.parse_args()
 
-    bootstrapper = AutoBootstrapSystem(args.project_root)
+    bootstrapper = AutoBootstrapSystem(args.project_root, verbose=not args.quiet, deep_checks=args.deep_checks)
     results = bootstrapper.bootstrap(mode=args.mode)
 
     # Exit with success code
@@ -6,14 +6,120 @@ Like Google's gen AI app builder but for ANY system.
 """
 
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+import asyncio
 from pathlib import Path
+import hashlib
 import json
+import mmap
 import os
-import subprocess
+import shlex
+import string
+import time
 from typing import Dict, List, Optional
 from dataclasses import dataclass, asdict
+from functools import cached_property, lru_cache
 from datetime import datetime
 
+try:
+    import orjson
+
+    _loads = orjson.loads
+
+    def _dumps_pretty(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:  # orjson is optional
+    _loads = json.loads
+
+    def _dumps_pretty(obj) -> str:
+        return json.dumps(obj, indent=2)
+
+try:
+    import numpy as np
+except ImportError:  # semantic plan cache disabled
+    np = None
+
+try:
+    from .gemini_generation import GeminiGenerator, JSON_OUTPUT
+except ImportError:  # run as a script
+    from gemini_generation import GeminiGenerator, JSON_OUTPUT
+
+
+README_TEMPLATE = string.Template("""# $name
+
+$description
+
+## Tech Stack
+
+$tech_stack
+
+## Features
+
+$features
+
+## Getting Started
+
+```bash
+# Install dependencies
+npm install
+
+# Run development server
+npm run dev
+
+# Build for production
+npm run build
+```
+
+## Architecture
+
+Generated by Auto Builder on $date
+
+## Deployment
+
+Target: $deployment_target
+
+---
+
+*Built with ❤️ by Auto Builder*
+""")
+
+# Descriptions at least this similar reuse a previous build's spec and architecture
+EMBEDDING_MODEL = 'models/text-embedding-004'
+SIMILAR_PLAN_THRESHOLD = 0.92
+
+CODE_SYSTEM_INSTRUCTION = """You generate code for the project described in the context.
+Use its tech stack and architecture.
+
+Requirements:
+- Follow best practices
+- Include error handling
+- Add type safety
+- Include comments
+- Production-ready quality"""
+
+# Per-file briefs, the batch prompt that lists them, and the plain-text
+# prompt for a single file the batch prompt could not produce
+COMPONENT_BRIEF = string.Template("Component $name: $purpose")
+ENDPOINT_BRIEF = string.Template(
+    "API endpoint $method $path: $purpose. "
+    "Include request validation, response formatting and authentication (if needed)."
+)
+CODE_BATCH_PROMPT = string.Template("""
+        Now emit code for every file below:
+
+        $listing
+
+        Return as JSON, using exactly the filenames above:
+        {"files": {"path/to/file": "complete file contents"}}
+        """)
+CODE_FILE_PROMPT = string.Template("""
+        Now emit code for this file:
+
+        - $filename: $brief
+
+        Return ONLY the code, no markdown, no explanations.
+        """)
+
 
 @dataclass
 class BuildSpec:
@@ -26,13 +132,18 @@ class BuildSpec:
     integrations: List[str]
     deployment_target: str  # "cloud-run", "vercel", "local", "docker"
 
+    @cached_property
+    def stack(self) -> frozenset:
+        """Lower-cased tech stack, for case-insensitive membership tests"""
+        return frozenset(tech.lower() for tech in self.tech_stack)
+
 
 @dataclass
 class BuildResult:
     """Result of an auto-build operation"""
     build_id: str
     spec: BuildSpec
-    files_created: Dict[str, str]  # filepath -> content
+    files_created: List[str]  # filepaths; content stays on disk
     commands_executed: List[str]
     build_time_seconds: float
     status: str  # "success", "partial", "failed"
@@ -40,6 +151,53 @@ class BuildResult:
     deployment_url: Optional[str]
     next_steps: List[str]
 
+    def get_content(self, path: str) -> str:
+        """Read a created file back from disk"""
+        return Path(path).read_text(encoding='utf-8')
+
+
+# Files at least this large are written through mmap instead of write()
+MMAP_WRITE_THRESHOLD = 64 * 1024
+
+
+def _write_text(path: Path, content: str):
+    """Write a generated file, copying large ones straight into a mapping of it"""
+
+    if len(content) < MMAP_WRITE_THRESHOLD:
+        path.write_text(content, encoding='utf-8')
+        return
+
+    data = content.encode('utf-8')
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.ftruncate(fd, len(data))
+        with mmap.mmap(fd, len(data)) as mapped:
+            mapped[:] = data
+    finally:
+        os.close(fd)
+
+
+@lru_cache(maxsize=None)
+def _file_extension_for(stack: frozenset) -> str:
+    if "typescript" in stack:
+        return "ts"
+    elif "react" in stack:
+        return "tsx"
+    elif "python" in stack:
+        return "py"
+    else:
+        return "js"
+
+
+@lru_cache(maxsize=None)
+def _entry_point_for(stack: frozenset) -> str:
+    if "react" in stack:
+        return "src/main.tsx"
+    elif "python" in stack:
+        return "main.py"
+    else:
+        return "src/index.js"
+
 
 class AutoBuilder:
     """
@@ -57,13 +215,16 @@ class AutoBuilder:
         if not api_key:
             raise ValueError("GEMINI_API_KEY required")
 
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
+        self._build_date = datetime.utcnow().date().isoformat()
 
         # Workspace
         self.workspace = Path(workspace_root or os.getcwd())
         self.builds_dir = self.workspace / "auto_builds"
         self.builds_dir.mkdir(exist_ok=True)
+        self.cache_dir = self.builds_dir / '.prompt_cache'
+
+        self._gemini = GeminiGenerator(api_key, self.cache_dir)
+        self.model = self._gemini.model
 
     async def build_from_description(self, description: str) -> BuildResult:
         """
@@ -75,46 +236,67 @@ class AutoBuilder:
             "Build a microservice that scrapes MLS listings"
         """
 
-        start_time = datetime.utcnow()
-
-        # Step 1: Generate Build Spec
-        print("🎯 Analyzing requirements...")
-        spec = await self._generate_build_spec(description)
+        start_ns = time.perf_counter_ns()
 
-        # Step 2: Generate Architecture
-        print("🏗️  Designing architecture...")
-        architecture = await self._generate_architecture(spec)
-
-        # Step 3: Generate Code
-        print("💻 Generating code...")
-        code_files = await self._generate_code(spec, architecture)
+        plan, embedding = await self._find_similar_plan(description)
+        if plan:
+            print("♻️  Reusing spec and architecture from a similar build...")
+            spec, architecture = plan
+        else:
+            # Step 1: Generate Build Spec
+            print("🎯 Analyzing requirements...")
+            spec = await self._generate_build_spec(description)
+            architecture = None
 
-        # Step 4: Create Files
-        print("📁 Creating files...")
         build_dir = self._create_build_directory(spec)
-        created_files = self._write_files(build_dir, code_files)
-
-        # Step 5: Setup & Install
-        print("📦 Installing dependencies...")
-        install_commands = await self._generate_install_commands(spec, build_dir)
-        executed_commands = self._execute_commands(install_commands, build_dir)
 
-        # Step 6: Generate Tests
-        print("🧪 Generating tests...")
-        test_files = await self._generate_tests(spec, architecture)
-        self._write_files(build_dir, test_files)
-
-        # Step 7: Generate Deployment Config
+        # Install commands and deployment config only need the spec: start them
+        # now so they overlap with architecture and code generation
         print("☁️  Generating deployment config...")
-        deploy_files = await self._generate_deployment_config(spec)
-        self._write_files(build_dir, deploy_files)
+        spec_phase = [
+            asyncio.create_task(self._generate_install_commands(spec, build_dir)),
+            asyncio.create_task(self._generate_deployment_config(spec)),
+        ]
 
-        # Step 8: Generate Documentation
-        print("📚 Generating documentation...")
-        docs = await self._generate_documentation(spec, architecture)
-        self._write_files(build_dir, docs)
+        architecture_phase = []
+        try:
+            if architecture is None:
+                # Step 2: Generate Architecture
+                print("🏗️  Designing architecture...")
+                architecture = await self._generate_architecture(spec)
+
+                self._store_plan(description, embedding, spec, architecture)
+
+            # Tests and docs only need the architecture, so they overlap with codegen
+            print("🧪 Generating tests...")
+            print("📚 Generating documentation...")
+            architecture_phase = [
+                asyncio.create_task(self._generate_tests(spec, architecture)),
+                asyncio.create_task(self._generate_documentation(spec, architecture)),
+            ]
+
+            # Step 3: Generate Code, writing files as soon as each batch is ready
+            print("💻 Generating code...")
+            created_files = await self._generate_code(spec, architecture, build_dir)
+
+            install_commands, deploy_files, test_files, docs = await asyncio.gather(
+                *spec_phase, *architecture_phase
+            )
+        except BaseException:
+            # Do not leave generation running unobserved after a failed step
+            tasks = spec_phase + architecture_phase
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        print("📦 Installing dependencies...")
+        executed_commands, _ = await asyncio.gather(
+            self._execute_commands(install_commands, build_dir),
+            self._write_files(build_dir, {**test_files, **deploy_files, **docs}),
+        )
 
-        build_time = (datetime.utcnow() - start_time).total_seconds()
+        build_time = (time.perf_counter_ns() - start_ns) / 1e9
 
         print(f"✅ Build complete in {build_time:.1f}s!")
 
@@ -161,10 +343,9 @@ class AutoBuilder:
         Choose modern, production-ready tech stack.
         """
 
-        response = self.model.generate_content(prompt)
-        spec_dict = json.loads(response.text)
-
-        return BuildSpec(**spec_dict)
+        return await self._gemini.generate(
+            prompt, generation_config=JSON_OUTPUT, parse=lambda text: BuildSpec(**_loads(text))
+        )
 
     async def _generate_architecture(self, spec: BuildSpec) -> Dict:
         """Generate system architecture"""
@@ -207,73 +388,150 @@ class AutoBuilder:
         Follow best practices for the chosen tech stack.
         """
 
-        response = self.model.generate_content(prompt)
-        return json.loads(response.text)
+        return await self._gemini.generate(prompt, generation_config=JSON_OUTPUT, parse=_loads)
+
+    async def _find_similar_plan(self, description: str) -> tuple:
+        """
+        Look up the spec and architecture of a previous build with a similar description.
+
+        Embeddings are stored L2-normalised as one float32 matrix, so a single
+        matrix-vector product gives the cosine similarity to every past build.
+        Returns (plan, embedding); plan is None on a miss, and embedding is None
+        too when no embedding could be computed.
+        """
 
-    async def _generate_code(self, spec: BuildSpec, architecture: Dict) -> Dict[str, str]:
-        """Generate all code files"""
+        if np is None:
+            return None, None
 
-        files = {}
+        try:
+            result = await genai.embed_content_async(model=EMBEDDING_MODEL, content=description)
+        except google_exceptions.GoogleAPIError:
+            return None, None  # plan normally, without recording this build
+        query = np.asarray(result['embedding'], dtype=np.float32)
+        query /= np.linalg.norm(query)
 
-        # Generate for each component
-        for component in architecture.get('components', []):
-            prompt = f"""
-            Generate production-ready code for:
+        index_path = self.cache_dir / 'embeddings.json'
+        if not index_path.exists():
+            return None, query
 
-            Component: {component['name']}
-            Purpose: {component['purpose']}
-            Tech Stack: {', '.join(spec.tech_stack)}
+        entries = json.loads(index_path.read_text(encoding='utf-8'))
+        sims = np.load(self.cache_dir / 'embeddings.npy')[:len(entries)] @ query
+        best = int(sims.argmax())
+        if sims[best] < SIMILAR_PLAN_THRESHOLD:
+            return None, query
 
-            Requirements:
-            - Follow best practices
-            - Include error handling
-            - Add type safety
-            - Include comments
-            - Production-ready quality
+        plan = json.loads((self.cache_dir / entries[best][1]).read_text(encoding='utf-8'))
 
-            Return ONLY the code, no markdown, no explanations.
-            """
+        # The build gets a name of its own, so it does not overwrite the
+        # directory of the build whose plan it reuses
+        suffix = hashlib.blake2b(description.encode(), digest_size=4).hexdigest()
+        spec = BuildSpec(**{**plan['spec'], 'name': f"{plan['spec']['name']}-{suffix}"})
+        return (spec, plan['architecture']), query
 
-            response = self.model.generate_content(prompt)
+    def _store_plan(self, description: str, embedding, spec: BuildSpec, architecture: Dict):
+        """Record a build's spec and architecture for _find_similar_plan"""
 
-            # Determine file extension based on tech stack
-            ext = self._get_file_extension(spec.tech_stack)
-            filename = f"src/components/{component['name']}.{ext}"
+        if embedding is None:
+            return
 
-            files[filename] = response.text
+        index_path = self.cache_dir / 'embeddings.json'
+        matrix_path = self.cache_dir / 'embeddings.npy'
+        plans_dir = self.cache_dir / 'plans'
+        plans_dir.mkdir(parents=True, exist_ok=True)
 
-        # Generate API endpoints
-        for endpoint in architecture.get('api_endpoints', []):
-            prompt = f"""
-            Generate production-ready API endpoint:
+        if index_path.exists():
+            entries = json.loads(index_path.read_text(encoding='utf-8'))
+            matrix = np.vstack([np.load(matrix_path)[:len(entries)], embedding])
+        else:
+            entries = []
+            matrix = embedding[np.newaxis, :]
+
+        plan_path = f"plans/{len(entries)}.json"
+        (self.cache_dir / plan_path).write_text(
+            json.dumps({"spec": asdict(spec), "architecture": architecture}), encoding='utf-8'
+        )
+        entries.append([description, plan_path])
 
-            Method: {endpoint['method']}
-            Path: {endpoint['path']}
-            Purpose: {endpoint['purpose']}
-            Tech Stack: {', '.join(spec.tech_stack)}
+        # Matrix first; readers ignore rows beyond the index if we stop in between
+        with open(matrix_path.with_suffix('.tmp'), 'wb') as f:
+            np.save(f, matrix)
+        os.replace(matrix_path.with_suffix('.tmp'), matrix_path)
+        index_path.with_suffix('.tmp').write_text(json.dumps(entries), encoding='utf-8')
+        os.replace(index_path.with_suffix('.tmp'), index_path)
 
-            Include:
-            - Request validation
-            - Error handling
-            - Response formatting
-            - Authentication (if needed)
+    async def _generate_code(self, spec: BuildSpec, architecture: Dict, build_dir: Path) -> List[str]:
+        """Generate all code files, writing each batch to build_dir as soon as it arrives"""
 
-            Return ONLY the code.
-            """
+        ext = _file_extension_for(spec.stack)
 
-            response = self.model.generate_content(prompt)
-            ext = self._get_file_extension(spec.tech_stack)
-            filename = f"src/api{endpoint['path'].replace('/', '_')}.{ext}"
+        # One (filename, brief) pair per component and API endpoint
+        items = [
+            (f"src/components/{component['name']}.{ext}", COMPONENT_BRIEF.substitute(component))
+            for component in architecture.get('components', [])
+        ]
+        items += [
+            (f"src/api{endpoint['path'].replace('/', '_')}.{ext}", ENDPOINT_BRIEF.substitute(endpoint))
+            for endpoint in architecture.get('api_endpoints', [])
+        ]
 
-            files[filename] = response.text
+        created = []
+        if items:
+            # Spec and architecture are sent once and reused by every batch
+            context = json.dumps({"spec": asdict(spec), "architecture": architecture}, indent=2)
+            model, preamble, cache = await self._gemini.open_context_cache(CODE_SYSTEM_INSTRUCTION, context)
+            try:
+                created = await self._generate_code_batch(items, model, preamble, build_dir)
+            finally:
+                if cache is not None:
+                    await asyncio.to_thread(cache.delete)
 
         # Generate main entry point
-        files[self._get_entry_point(spec)] = await self._generate_main_file(spec, architecture)
+        files = {self._get_entry_point(spec): await self._generate_main_file(spec, architecture)}
 
         # Generate config files
         files.update(await self._generate_config_files(spec))
 
-        return files
+        created += await self._write_files(build_dir, files)
+        return created
+
+    async def _generate_code_batch(self, items: List[tuple], model: genai.GenerativeModel,
+                                   preamble: str, build_dir: Path) -> List[str]:
+        """Generate several files in a single Gemini request and write them to build_dir.
+
+        Only the requested filenames are taken from the response. If it is cut
+        off at the output token cap, or leaves a requested file out, the batch
+        is split in two halves which are generated concurrently; a single file
+        that still comes back missing is requested again as plain text.
+        """
+
+        listing = "\n".join(f"- {filename}: {brief}" for filename, brief in items)
+        prompt = preamble + CODE_BATCH_PROMPT.substitute(listing=listing)
+
+        def parse(text: str) -> Dict[str, str]:
+            generated = _loads(text)['files']
+            return {filename: generated[filename] for filename, _ in items}
+
+        try:
+            files = await self._gemini.generate(
+                prompt, generation_config=JSON_OUTPUT, model=model, parse=parse
+            )
+        except (ValueError, KeyError, TypeError):
+            if len(items) > 1:
+                mid = len(items) // 2
+                first, second = await asyncio.gather(
+                    self._generate_code_batch(items[:mid], model, preamble, build_dir),
+                    self._generate_code_batch(items[mid:], model, preamble, build_dir),
+                )
+                return first + second
+
+            # The response is written as-is, so a lone file cannot fail to parse
+            filename, brief = items[0]
+            files = {filename: await self._gemini.generate(
+                preamble + CODE_FILE_PROMPT.substitute(filename=filename, brief=brief), model=model
+            )}
+
+        # Write while any sibling batches are still generating
+        return await self._write_files(build_dir, files)
 
     async def _generate_tests(self, spec: BuildSpec, architecture: Dict) -> Dict[str, str]:
         """Generate test files"""
@@ -302,43 +560,14 @@ class AutoBuilder:
     async def _generate_documentation(self, spec: BuildSpec, architecture: Dict) -> Dict[str, str]:
         """Generate documentation"""
 
-        readme = f"""# {spec.name}
-
-{spec.description}
-
-## Tech Stack
-
-{chr(10).join(f'- {tech}' for tech in spec.tech_stack)}
-
-## Features
-
-{chr(10).join(f'- {feature}' for feature in spec.features)}
-
-## Getting Started
-
-```bash
-# Install dependencies
-npm install
-
-# Run development server
-npm run dev
-
-# Build for production
-npm run build
-```
-
-## Architecture
-
-Generated by Auto Builder on {datetime.utcnow().strftime('%Y-%m-%d')}
-
-## Deployment
-
-Target: {spec.deployment_target}
-
----
-
-*Built with ❤️ by Auto Builder*
-"""
+        readme = README_TEMPLATE.substitute(
+            name=spec.name,
+            description=spec.description,
+            tech_stack="\n".join(["- " + tech for tech in spec.tech_stack]),
+            features="\n".join(["- " + feature for feature in spec.features]),
+            date=self._build_date,
+            deployment_target=spec.deployment_target,
+        )
 
         return {"README.md": readme}
 
@@ -350,69 +579,80 @@ Target: {spec.deployment_target}
 
         return build_dir
 
-    def _write_files(self, build_dir: Path, files: Dict[str, str]) -> Dict[str, str]:
-        """Write files to disk"""
+    async def _write_files(self, build_dir: Path, files: Dict[str, str]) -> List[str]:
+        """Write files to disk concurrently"""
 
-        created = {}
+        full_paths = [build_dir / filepath for filepath in files]
 
-        for filepath, content in files.items():
-            full_path = build_dir / filepath
-            full_path.parent.mkdir(exist_ok=True, parents=True)
+        # Names derived from model output must not escape the build directory
+        root = build_dir.resolve()
+        for path in full_paths:
+            if not path.resolve().is_relative_to(root):
+                raise ValueError(f"Refusing to write outside {build_dir}: {path}")
 
-            full_path.write_text(content, encoding='utf-8')
-            created[str(full_path)] = content
+        # One mkdir per distinct parent rather than per file
+        for parent in {path.parent for path in full_paths}:
+            parent.mkdir(exist_ok=True, parents=True)
 
-        return created
+        await asyncio.gather(*[
+            asyncio.to_thread(_write_text, path, content)
+            for path, content in zip(full_paths, files.values())
+        ])
+
+        return [str(path) for path in full_paths]
 
     async def _generate_install_commands(self, spec: BuildSpec, build_dir: Path) -> List[str]:
         """Generate installation commands"""
 
         commands = []
 
-        if "react" in spec.tech_stack or "node" in spec.tech_stack:
-            commands.append("npm install")
+        if "react" in spec.stack or "node" in spec.stack:
+            # npm ci needs a lockfile; either way prefer the local package cache
+            if (build_dir / "package-lock.json").exists():
+                commands.append("npm ci --prefer-offline")
+            else:
+                commands.append("npm install --prefer-offline")
 
-        if "python" in spec.tech_stack:
+        if "python" in spec.stack:
             commands.append("pip install -r requirements.txt")
 
         return commands
 
-    def _execute_commands(self, commands: List[str], cwd: Path) -> List[str]:
-        """Execute shell commands"""
+    async def _execute_commands(self, commands: List[str], cwd: Path) -> List[str]:
+        """Execute commands concurrently, without a shell"""
 
-        executed = []
-
-        for cmd in commands:
+        async def _run(cmd: str) -> bool:
             try:
-                subprocess.run(cmd, shell=True, cwd=cwd, check=True)
-                executed.append(cmd)
-            except subprocess.CalledProcessError as e:
+                proc = await asyncio.create_subprocess_exec(
+                    *shlex.split(cmd), cwd=cwd,
+                    stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+                )
+            except OSError as e:
                 print(f"⚠️  Command failed: {cmd}")
                 print(f"   Error: {e}")
+                return False
 
-        return executed
+            _, stderr = await proc.communicate()
+            if proc.returncode != 0:
+                print(f"⚠️  Command failed: {cmd}")
+                print(f"   Error: exit status {proc.returncode}")
+                if stderr:
+                    print(f"   {stderr.decode(errors='replace').strip()[-500:]}")
+                return False
+            return True
+
+        results = await asyncio.gather(*[_run(cmd) for cmd in commands])
+        return [cmd for cmd, ok in zip(commands, results) if ok]
 
     def _get_file_extension(self, tech_stack: List[str]) -> str:
         """Determine file extension from tech stack"""
 
-        if "typescript" in tech_stack:
-            return "ts"
-        elif "react" in tech_stack:
-            return "tsx"
-        elif "python" in tech_stack:
-            return "py"
-        else:
-            return "js"
+        return _file_extension_for(frozenset(tech.lower() for tech in tech_stack))
 
     def _get_entry_point(self, spec: BuildSpec) -> str:
         """Determine main entry point filename"""
 
-        if "react" in spec.tech_stack:
-            return "src/main.tsx"
-        elif "python" in spec.tech_stack:
-            return "main.py"
-        else:
-            return "src/index.js"
+        return _entry_point_for(spec.stack)
 
     async def _generate_main_file(self, spec: BuildSpec, architecture: Dict) -> str:
         """Generate main entry point file"""
@@ -425,8 +665,8 @@ Target: {spec.deployment_target}
 
         files = {}
 
-        if "typescript" in spec.tech_stack or "react" in spec.tech_stack:
-            files["package.json"] = json.dumps({
+        if "typescript" in spec.stack or "react" in spec.stack:
+            files["package.json"] = _dumps_pretty({
                 "name": spec.name,
                 "version": "1.0.0",
                 "type": "module",
@@ -435,7 +675,7 @@ Target: {spec.deployment_target}
                     "build": "vite build",
                     "preview": "vite preview"
                 }
-            }, indent=2)
+            })
 
         return files
 
@@ -464,8 +704,8 @@ Target: {spec.deployment_target}
 
         return [
             f"cd {build_dir}",
-            "npm install" if "node" in spec.tech_stack else "pip install -r requirements.txt",
-            "npm run dev" if "node" in spec.tech_stack else "python main.py",
+            "npm install" if "node" in spec.stack else "pip install -r requirements.txt",
+            "npm run dev" if "node" in spec.stack else "python main.py",
             f"Open http://localhost:3000"
         ]
 
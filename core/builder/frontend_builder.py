@@ -6,31 +6,37 @@ Inspired by how Manus was built with Google's tools.
 """
 
 import google.generativeai as genai
+import asyncio
 from pathlib import Path
 import json
 import os
-from typing import Dict, List
+import string
+from typing import Dict, List, Optional
 
+try:
+    import orjson
 
-class FrontendBuilder:
-    """
-    Build complete frontends using AI.
+    _loads = orjson.loads
 
-    Similar to Google's gen AI app builder but specialized for frontends.
-    """
+    def _dumps_pretty(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:  # orjson is optional
+    _loads = json.loads
 
-    def __init__(self, gemini_api_key: str = None):
-        api_key = gemini_api_key or os.getenv('GEMINI_API_KEY')
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
+    def _dumps_pretty(obj) -> str:
+        return json.dumps(obj, indent=2)
 
-    async def build_component(self, description: str) -> str:
-        """Build a single React component from description"""
+try:
+    from .gemini_generation import GeminiGenerator, JSON_OUTPUT
+except ImportError:  # run as a script
+    from gemini_generation import GeminiGenerator, JSON_OUTPUT
 
-        prompt = f"""
+
+# Per-component and per-page prompts, built once and filled in for each item
+COMPONENT_PROMPT = string.Template("""
         Generate a production-ready React TypeScript component:
 
-        Description: {description}
+        Description: $description
 
         Requirements:
         - Use React 18+ with TypeScript
@@ -41,18 +47,12 @@ class FrontendBuilder:
         - Follow best practices
 
         Return ONLY the complete component code, no markdown, no explanations.
-        """
-
-        response = self.model.generate_content(prompt)
-        return response.text
+        """)
 
-    async def build_page(self, description: str) -> Dict[str, str]:
-        """Build a complete page with multiple components"""
-
-        prompt = f"""
+PAGE_PROMPT = string.Template("""
         Design a complete React page:
 
-        Description: {description}
+        Description: $description
 
         Break down into:
         1. Layout component
@@ -62,29 +62,295 @@ class FrontendBuilder:
         5. API calls needed
 
         Return as JSON:
-        {{
+        {
             "page_name": "PageName",
             "layout": "LayoutComponent",
             "components": [
-                {{"name": "ComponentName", "purpose": "what it does"}}
+                {"name": "ComponentName", "purpose": "what it does"}
             ],
             "helpers": ["helper1", "helper2"],
-            "types": {{"TypeName": "type definition"}},
+            "types": {"TypeName": "type definition"},
             "api_calls": [
-                {{"name": "fetchData", "endpoint": "/api/endpoint", "method": "GET"}}
+                {"name": "fetchData", "endpoint": "/api/endpoint", "method": "GET"}
             ]
-        }}
-        """
+        }
+        """)
+
+APP_SYSTEM_INSTRUCTION = """You build pages and components for the React/Vite application
+whose structure is given in the context. Keep names, routes and state consistent with it."""
+
+
+_APP_NAME = "__APP_NAME__"
+
+
+def _build_config_templates() -> Dict[str, str]:
+    """Configuration files with the app name left as a placeholder"""
+
+    files = {}
+
+    # package.json
+    files["package.json"] = _dumps_pretty({
+        "name": _APP_NAME,
+        "version": "1.0.0",
+        "type": "module",
+        "scripts": {
+            "dev": "vite",
+            "build": "tsc && vite build",
+            "preview": "vite preview"
+        },
+        "dependencies": {
+            "react": "^18.2.0",
+            "react-dom": "^18.2.0",
+            "react-router-dom": "^6.20.0"
+        },
+        "devDependencies": {
+            "@types/react": "^18.2.37",
+            "@types/react-dom": "^18.2.15",
+            "@vitejs/plugin-react": "^4.2.1",
+            "typescript": "^5.2.2",
+            "vite": "^5.0.8",
+            "tailwindcss": "^3.4.0",
+            "autoprefixer": "^10.4.16",
+            "postcss": "^8.4.31"
+        }
+    })
+
+    # vite.config.ts
+    files["vite.config.ts"] = """import { defineConfig } from 'vite'
+import react from '@vitejs/plugin-react'
 
-        response = self.model.generate_content(prompt)
-        design = json.loads(response.text)
+export default defineConfig({
+  plugins: [react()],
+})
+"""
 
-        # Generate each component
-        files = {}
+    # tsconfig.json
+    files["tsconfig.json"] = _dumps_pretty({
+        "compilerOptions": {
+            "target": "ES2020",
+            "useDefineForClassFields": True,
+            "lib": ["ES2020", "DOM", "DOM.Iterable"],
+            "module": "ESNext",
+            "skipLibCheck": True,
+            "moduleResolution": "bundler",
+            "allowImportingTsExtensions": True,
+            "resolveJsonModule": True,
+            "isolatedModules": True,
+            "noEmit": True,
+            "jsx": "react-jsx",
+            "strict": True,
+            "noUnusedLocals": True,
+            "noUnusedParameters": True,
+            "noFallthroughCasesInSwitch": True
+        },
+        "include": ["src"],
+        "references": [{"path": "./tsconfig.node.json"}]
+    })
+
+    # tailwind.config.js
+    files["tailwind.config.js"] = """/** @type {import('tailwindcss').Config} */
+export default {
+  content: [
+    "./index.html",
+    "./src/**/*.{js,ts,jsx,tsx}",
+  ],
+  theme: {
+    extend: {},
+  },
+  plugins: [],
+}
+"""
+
+    # index.html
+    files["index.html"] = f"""<!doctype html>
+<html lang="en">
+  <head>
+    <meta charset="UTF-8" />
+    <link rel="icon" type="image/svg+xml" href="/vite.svg" />
+    <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+    <title>{_APP_NAME}</title>
+  </head>
+  <body>
+    <div id="root"></div>
+    <script type="module" src="/src/main.tsx"></script>
+  </body>
+</html>
+"""
+
+    # index.css
+    files["src/index.css"] = """@tailwind base;
+@tailwind components;
+@tailwind utilities;
+"""
+
+    return files
+
+
+# Serialised once; only the app name varies between builds
+_CONFIG_TEMPLATES = _build_config_templates()
 
-        for component in design['components']:
-            code = await self.build_component(component['purpose'])
-            files[f"src/components/{component['name']}.tsx"] = code
+
+# Canonical layout components, served without a Gemini round-trip
+_SHARED_TEMPLATES: Dict[str, str] = {
+    "Header": """import { Link } from 'react-router-dom'
+
+interface HeaderProps {
+  title?: string
+}
+
+export default function Header({ title = 'Home' }: HeaderProps) {
+  return (
+    <header className="sticky top-0 z-40 border-b border-gray-200 bg-white/90 backdrop-blur">
+      <div className="mx-auto flex h-16 max-w-7xl items-center justify-between px-4 sm:px-6 lg:px-8">
+        <Link to="/" className="text-lg font-semibold text-gray-900">
+          {title}
+        </Link>
+      </div>
+    </header>
+  )
+}
+""",
+    "Footer": """export default function Footer() {
+  return (
+    <footer className="border-t border-gray-200 bg-white">
+      <div className="mx-auto max-w-7xl px-4 py-6 text-center text-sm text-gray-500 sm:px-6 lg:px-8">
+        &copy; {new Date().getFullYear()} All rights reserved.
+      </div>
+    </footer>
+  )
+}
+""",
+    "Sidebar": """import { NavLink } from 'react-router-dom'
+
+export interface SidebarItem {
+  label: string
+  to: string
+}
+
+interface SidebarProps {
+  items?: SidebarItem[]
+}
+
+export default function Sidebar({ items = [] }: SidebarProps) {
+  return (
+    <aside className="hidden w-64 shrink-0 border-r border-gray-200 bg-white md:block">
+      <nav className="flex flex-col gap-1 p-4">
+        {items.map((item) => (
+          <NavLink
+            key={item.to}
+            to={item.to}
+            className={({ isActive }) =>
+              `rounded-md px-3 py-2 text-sm font-medium ${
+                isActive ? 'bg-gray-100 text-gray-900' : 'text-gray-600 hover:bg-gray-50'
+              }`
+            }
+          >
+            {item.label}
+          </NavLink>
+        ))}
+      </nav>
+    </aside>
+  )
+}
+""",
+    "Navbar": """import { useState } from 'react'
+import { NavLink } from 'react-router-dom'
+
+export interface NavItem {
+  label: string
+  to: string
+}
+
+interface NavbarProps {
+  brand?: string
+  items?: NavItem[]
+}
+
+export default function Navbar({ brand = 'Home', items = [] }: NavbarProps) {
+  const [open, setOpen] = useState(false)
+
+  const linkClass = ({ isActive }: { isActive: boolean }) =>
+    `block rounded-md px-3 py-2 text-sm font-medium ${
+      isActive ? 'bg-gray-100 text-gray-900' : 'text-gray-600 hover:bg-gray-50'
+    }`
+
+  return (
+    <nav className="border-b border-gray-200 bg-white">
+      <div className="mx-auto flex h-16 max-w-7xl items-center justify-between px-4 sm:px-6 lg:px-8">
+        <NavLink to="/" className="text-lg font-semibold text-gray-900">
+          {brand}
+        </NavLink>
+        <button
+          type="button"
+          className="rounded-md p-2 text-gray-600 md:hidden"
+          aria-label="Toggle navigation"
+          aria-expanded={open}
+          onClick={() => setOpen((value) => !value)}
+        >
+          ☰
+        </button>
+        <div className="hidden gap-2 md:flex">
+          {items.map((item) => (
+            <NavLink key={item.to} to={item.to} className={linkClass}>
+              {item.label}
+            </NavLink>
+          ))}
+        </div>
+      </div>
+      {open && (
+        <div className="space-y-1 px-4 pb-4 md:hidden">
+          {items.map((item) => (
+            <NavLink key={item.to} to={item.to} className={linkClass} onClick={() => setOpen(false)}>
+              {item.label}
+            </NavLink>
+          ))}
+        </div>
+      )}
+    </nav>
+  )
+}
+""",
+}
+
+
+class FrontendBuilder:
+    """
+    Build complete frontends using AI.
+
+    Similar to Google's gen AI app builder but specialized for frontends.
+    """
+
+    def __init__(self, gemini_api_key: str = None, cache_dir: str = None):
+        api_key = gemini_api_key or os.getenv('GEMINI_API_KEY')
+        self.cache_dir = Path(cache_dir or Path("auto_builds") / ".prompt_cache")
+        self._gemini = GeminiGenerator(api_key, self.cache_dir)
+        self.model = self._gemini.model
+
+    async def build_component(self, description: str,
+                              model: Optional[genai.GenerativeModel] = None) -> str:
+        """Build a single React component from description"""
+
+        prompt = COMPONENT_PROMPT.substitute(description=description)
+
+        return await self._gemini.generate(prompt, model=model)
+
+    async def build_page(self, description: str,
+                         model: Optional[genai.GenerativeModel] = None) -> Dict[str, str]:
+        """Build a complete page with multiple components"""
+
+        prompt = PAGE_PROMPT.substitute(description=description)
+
+        design = await self._gemini.generate(prompt, JSON_OUTPUT, model, parse=_loads)
+
+        # Generate each component concurrently
+        codes = await asyncio.gather(*[
+            self.build_component(component['purpose'], model)
+            for component in design['components']
+        ])
+        files = {
+            f"src/components/{component['name']}.tsx": code
+            for component, code in zip(design['components'], codes)
+        }
 
         # Generate main page
         page_code = await self._generate_page_code(design)
@@ -124,24 +390,45 @@ class FrontendBuilder:
         }}
         """
 
-        response = self.model.generate_content(prompt)
-        structure = json.loads(response.text)
+        structure = await self._gemini.generate(prompt, generation_config=JSON_OUTPUT, parse=_loads)
 
         print(f"🏗️  Building {structure['app_name']}...")
 
         files = {}
-
-        # Generate pages
-        for page in structure['pages']:
-            print(f"  📄 Generating {page['name']}...")
-            page_files = await self.build_page(page['purpose'])
-            files.update(page_files)
-
-        # Generate shared components
-        for component in structure['shared_components']:
-            print(f"  🧩 Generating {component}...")
-            code = await self.build_component(f"Create a {component} component")
-            files[f"src/components/{component}.tsx"] = code
+        # Every page shares the app structure through one context cache
+        model, _, cache = await self._gemini.open_context_cache(
+            APP_SYSTEM_INSTRUCTION, json.dumps(structure, indent=2)
+        )
+
+        try:
+            # Generate pages concurrently
+            for page in structure['pages']:
+                print(f"  📄 Generating {page['name']}...")
+            page_results = await asyncio.gather(*[
+                self.build_page(page['purpose'], model) for page in structure['pages']
+            ])
+            for page_files in page_results:
+                files.update(page_files)
+
+            # Shared components with a stock template skip the LLM; the rest
+            # are generated concurrently
+            generated = []
+            for component in structure['shared_components']:
+                if component in _SHARED_TEMPLATES:
+                    print(f"  🧩 Using template for {component}...")
+                    files[f"src/components/{component}.tsx"] = _SHARED_TEMPLATES[component]
+                else:
+                    print(f"  🧩 Generating {component}...")
+                    generated.append(component)
+            codes = await asyncio.gather(*[
+                self.build_component(f"Create a {component} component", model)
+                for component in generated
+            ])
+            for component, code in zip(generated, codes):
+                files[f"src/components/{component}.tsx"] = code
+        finally:
+            if cache is not None:
+                await asyncio.to_thread(cache.delete)
 
         # Generate config files
         print("  ⚙️  Generating config...")
@@ -208,104 +495,12 @@ ReactDOM.createRoot(document.getElementById('root')!).render(
 """
 
     def _generate_config_files(self, structure: Dict) -> Dict[str, str]:
-        """Generate configuration files"""
-
-        files = {}
+        """Generate configuration files from the templates prebuilt at import"""
 
-        # package.json
-        files["package.json"] = json.dumps({
-            "name": structure['app_name'],
-            "version": "1.0.0",
-            "type": "module",
-            "scripts": {
-                "dev": "vite",
-                "build": "tsc && vite build",
-                "preview": "vite preview"
-            },
-            "dependencies": {
-                "react": "^18.2.0",
-                "react-dom": "^18.2.0",
-                "react-router-dom": "^6.20.0"
-            },
-            "devDependencies": {
-                "@types/react": "^18.2.37",
-                "@types/react-dom": "^18.2.15",
-                "@vitejs/plugin-react": "^4.2.1",
-                "typescript": "^5.2.2",
-                "vite": "^5.0.8",
-                "tailwindcss": "^3.4.0",
-                "autoprefixer": "^10.4.16",
-                "postcss": "^8.4.31"
-            }
-        }, indent=2)
-
-        # vite.config.ts
-        files["vite.config.ts"] = """import { defineConfig } from 'vite'
-import react from '@vitejs/plugin-react'
-
-export default defineConfig({
-  plugins: [react()],
-})
-"""
-
-        # tsconfig.json
-        files["tsconfig.json"] = json.dumps({
-            "compilerOptions": {
-                "target": "ES2020",
-                "useDefineForClassFields": True,
-                "lib": ["ES2020", "DOM", "DOM.Iterable"],
-                "module": "ESNext",
-                "skipLibCheck": True,
-                "moduleResolution": "bundler",
-                "allowImportingTsExtensions": True,
-                "resolveJsonModule": True,
-                "isolatedModules": True,
-                "noEmit": True,
-                "jsx": "react-jsx",
-                "strict": True,
-                "noUnusedLocals": True,
-                "noUnusedParameters": True,
-                "noFallthroughCasesInSwitch": True
-            },
-            "include": ["src"],
-            "references": [{"path": "./tsconfig.node.json"}]
-        }, indent=2)
-
-        # tailwind.config.js
-        files["tailwind.config.js"] = """/** @type {import('tailwindcss').Config} */
-export default {
-  content: [
-    "./index.html",
-    "./src/**/*.{js,ts,jsx,tsx}",
-  ],
-  theme: {
-    extend: {},
-  },
-  plugins: [],
-}
-"""
-
-        # index.html
-        files["index.html"] = f"""<!doctype html>
-<html lang="en">
-  <head>
-    <meta charset="UTF-8" />
-    <link rel="icon" type="image/svg+xml" href="/vite.svg" />
-    <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-    <title>{structure['app_name']}</title>
-  </head>
-  <body>
-    <div id="root"></div>
-    <script type="module" src="/src/main.tsx"></script>
-  </body>
-</html>
-"""
-
-        # index.css
-        files["src/index.css"] = """@tailwind base;
-@tailwind components;
-@tailwind utilities;
-"""
+        app_name = structure['app_name']
+        files = dict(_CONFIG_TEMPLATES)
+        files["package.json"] = files["package.json"].replace(f'"{_APP_NAME}"', _dumps_pretty(app_name))
+        files["index.html"] = files["index.html"].replace(_APP_NAME, app_name)
 
         return files
 
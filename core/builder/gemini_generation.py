@@ -0,0 +1,149 @@
+"""
+Gemini generation shared by the builders
+
+Bounded concurrency, an on-disk prompt cache and Gemini context caches.
+"""
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+import asyncio
+from pathlib import Path
+import hashlib
+import io
+import json
+import os
+import threading
+from datetime import timedelta
+from typing import Dict, Optional
+
+
+GEMINI_MODEL = 'gemini-1.5-flash'
+
+# gRPC multiplexes every concurrent request over one pooled HTTP/2 channel per
+# client, so the TLS handshake is paid once per build rather than per call.
+# 'grpc_asyncio' is not usable here: context caches only have a sync API.
+GEMINI_TRANSPORT = 'grpc'
+
+# Context caching needs a pinned model version
+CACHED_MODEL = 'models/gemini-1.5-flash-001'
+CONTEXT_CACHE_TTL = timedelta(minutes=10)
+
+# Upper bound on in-flight Gemini requests, to stay under the API rate limit
+MAX_CONCURRENT_GENERATIONS = 8
+
+# Deterministic sampling, so cached responses are what a rerun would produce
+GENERATION_CONFIG = {"temperature": 0}
+
+# Generation config for prompts that must answer with parseable JSON
+JSON_OUTPUT = {**GENERATION_CONFIG, "response_mime_type": "application/json"}
+
+
+class GeminiGenerator:
+    """Gemini client for a builder, caching responses under cache_dir"""
+
+    def __init__(self, api_key: str, cache_dir: Path):
+        genai.configure(api_key=api_key, transport=GEMINI_TRANSPORT)
+        self.model = genai.GenerativeModel(GEMINI_MODEL)
+        self.cache_dir = cache_dir
+        self._generation_slots = asyncio.Semaphore(MAX_CONCURRENT_GENERATIONS)
+        self._inflight: Dict[Path, asyncio.Future] = {}
+
+    async def generate(self, prompt: str, generation_config: Optional[Dict] = None,
+                       model: Optional[genai.GenerativeModel] = None, parse=None):
+        """
+        Call Gemini through the SDK's native async API, bounded by the semaphore.
+
+        Responses are cached on disk under a key covering the model, the context
+        cache contents (by their hashed display name) and the generation config,
+        so reruns with identical inputs never reach the API. Identical prompts
+        issued concurrently share a single in-flight request.
+
+        If given, parse is applied to the response text and its result returned.
+        A response is only cached once it parses, and a cached response that no
+        longer parses is evicted, so a bad reply is never replayed.
+        """
+
+        model = model or self.model
+        generation_config = generation_config or GENERATION_CONFIG
+        path = self._prompt_cache_path(model, prompt, generation_config)
+
+        try:
+            text = path.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            pass
+        else:
+            try:
+                return parse(text) if parse else text
+            except Exception:
+                path.unlink(missing_ok=True)
+                raise
+
+        request = self._inflight.get(path)
+        owner = request is None
+        if owner:
+            request = asyncio.ensure_future(self._request(model, prompt, generation_config))
+            self._inflight[path] = request
+            request.add_done_callback(lambda _: self._inflight.pop(path, None))
+
+        # Shielded so one cancelled caller does not cancel the shared request
+        text = await asyncio.shield(request)
+        result = parse(text) if parse else text
+
+        if owner:
+            await asyncio.to_thread(self._store_response, path, text)
+        return result
+
+    async def _request(self, model: genai.GenerativeModel, prompt: str,
+                       generation_config: Dict) -> str:
+        """Stream one response from Gemini"""
+
+        buf = io.StringIO()
+        async with self._generation_slots:
+            response = await model.generate_content_async(
+                prompt, generation_config=generation_config, stream=True
+            )
+            async for chunk in response:
+                buf.write(chunk.text)
+        return buf.getvalue()
+
+    def _prompt_cache_path(self, model: genai.GenerativeModel, prompt: str, generation_config: Dict) -> Path:
+        """Location of the cached response for a prompt"""
+
+        cached_content = getattr(model, 'cached_content', None)
+        key = hashlib.blake2b("\0".join((
+            model.model_name,
+            getattr(cached_content, 'display_name', None) or "",
+            json.dumps(generation_config, sort_keys=True), prompt,
+        )).encode()).hexdigest()
+        return self.cache_dir / key[:2] / key
+
+    def _store_response(self, path: Path, text: str):
+        """Atomically write a response into the prompt cache"""
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(text, encoding='utf-8')
+        os.replace(tmp, path)
+
+    async def open_context_cache(self, system_instruction: str, context: str) -> tuple:
+        """
+        Store a prompt prefix shared by many requests in a Gemini context cache.
+
+        Returns (model, preamble, cache). Gemini refuses caches below its minimum
+        token count; in that case the prefix is returned as a preamble to be sent
+        inline with each prompt, and cache is None.
+        """
+
+        try:
+            cache = await asyncio.to_thread(
+                genai.caching.CachedContent.create,
+                model=CACHED_MODEL,
+                system_instruction=system_instruction,
+                contents=[context],
+                display_name=hashlib.blake2b(context.encode(), digest_size=16).hexdigest(),
+                ttl=CONTEXT_CACHE_TTL,
+            )
+        except google_exceptions.GoogleAPIError:
+            return self.model, f"{system_instruction}\n\n{context}\n\n", None
+
+        return genai.GenerativeModel.from_cached_content(cached_content=cache), "", cache
@@ -4,15 +4,206 @@ Tracks every document change, learns patterns, auto-suggests improvements
 Complete audit trail with AI-powered analysis
 """
 
+import asyncio
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+from itertools import accumulate
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 import difflib
+import hashlib
 import json
+import logging
 from pathlib import Path
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from google.cloud import firestore
 
+try:
+    from diff_match_patch import diff_match_patch
+except ImportError:  # fall back to difflib
+    diff_match_patch = None
+
+try:
+    from cdifflib import CSequenceMatcher as SequenceMatcher
+except ImportError:  # pure-Python matcher
+    SequenceMatcher = difflib.SequenceMatcher
+
+try:
+    import numpy as np
+except ImportError:  # counts and trend computed in Python
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+# Upper bound on time spent diffing a single change; past it the diff is
+# still correct, just less minimal
+DIFF_TIMEOUT_SECONDS = 1.0
+
+# Queued Firestore writes are committed at this size, under the 500-op cap
+FIRESTORE_BATCH_LIMIT = 400
+
+# Upper bound on concurrent day-range queries behind one evolution report
+MAX_REPORT_SHARDS = 16
+
+# Lines of unchanged context around each hunk, as in `diff -u`
+DIFF_CONTEXT_LINES = 3
+
+# Records carry this much of the unified diff; longer diffs are stored
+# whole in the document_diffs collection
+DIFF_PREVIEW_CHARS = 1000
+
+# Changes touching less than this fraction of a document's lines are scored
+# as quality-neutral without asking Gemini
+TRIVIAL_DIFF_RATIO = 0.02
+
+# Cached quality scores carry an expires_at field for a Firestore TTL policy
+QUALITY_CACHE_TTL = timedelta(days=30)
+
+QUALITY_INSTRUCTION = """Assess the quality of the document you are given on a scale of 0-1.
+
+Consider:
+- Clarity and readability
+- Completeness
+- Accuracy
+- Structure
+- Actionability
+
+Return only a number between 0 and 1."""
+
+# Fields of document_evolution read by get_evolution_report
+REPORT_FIELDS = ('doc_id', 'author', 'timestamp', 'lines_added', 'lines_removed', 'quality_delta')
+
+# Changes waiting for insights are analyzed this many at a time
+INSIGHT_BATCH_SIZE = 8
+
+INSIGHT_INSTRUCTION = """Analyze each document change you are given and provide insights:
+
+1. What improved?
+2. What risks were introduced?
+3. What could be better?
+4. Patterns observed
+
+Return a JSON array holding one string of insights per change, in the order given."""
+
+# Documents whose latest change record is kept in memory to answer
+# re-submitted changes; the least recently changed are evicted past this
+LATEST_RECORDS_SIZE = 1024
+
+
+def _most_common(values: List[str], n: int = 10) -> tuple:
+    """
+    The n most frequent values with their counts, most frequent first, and
+    the number of distinct values. With numpy, values are coded by np.unique
+    and counted with np.bincount; only the top n are partitioned out and sorted.
+    """
+
+    if np is None or not values:
+        counts = Counter(values)
+        return counts.most_common(n), len(counts)
+
+    uniques, codes = np.unique(np.asarray(values), return_inverse=True)
+    counts = np.bincount(codes)
+    top = np.arange(len(counts)) if len(counts) <= n else np.argpartition(-counts, n - 1)[:n]
+    top = top[np.argsort(-counts[top], kind='stable')]
+    return [(uniques[i].item(), int(counts[i])) for i in top], len(uniques)
+
+
+def _hunk_range(start: int, stop: int) -> str:
+    """Format a line range the way unified diff hunk headers do"""
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f'{beginning}'
+    if not length:
+        beginning -= 1
+    return f'{beginning},{length}'
+
+
+def _unified_diff(old_content: str, new_content: str) -> tuple:
+    """
+    Unified diff built from SequenceMatcher opcodes, so the C matcher from
+    cdifflib does the matching when available. Returns (diff text, lines
+    added, lines removed).
+
+    Lines are compared whole by hash, so long single-line documents cost
+    time proportional to their length, not quadratic in it.
+    """
+
+    a = old_content.splitlines(keepends=True)
+    b = new_content.splitlines(keepends=True)
+
+    # As GNU diff does, keep common leading and trailing lines out of the
+    # matcher, apart from the context lines the hunks next to them need
+    limit = min(len(a), len(b))
+    prefix = 0
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    lo = max(prefix - DIFF_CONTEXT_LINES, 0)
+    hi = max(suffix - DIFF_CONTEXT_LINES, 0)
+    a = a[lo:len(a) - hi]
+    b = b[lo:len(b) - hi]
+    matcher = SequenceMatcher(None, a, b)
+    return _format_hunks(a, b, matcher.get_grouped_opcodes(DIFF_CONTEXT_LINES), lo)
+
+
+def _group_opcodes(codes: list, n: int):
+    """Group opcodes into hunks with n lines of context, as SequenceMatcher does"""
+
+    if not codes:
+        return
+    if codes[0][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+    group = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == 'equal' and i2 - i1 > 2 * n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == 'equal'):
+        yield group
+
+
+def _format_hunks(a: list, b: list, groups, offset: int = 0) -> tuple:
+    """
+    Render grouped opcodes over the line lists a and b as unified diff text.
+    offset is the number of leading lines trimmed from both. Returns (diff
+    text, lines added, lines removed).
+    """
+
+    out = []
+    lines_added = lines_removed = 0
+    for group in groups:
+        if not out:
+            out += ['--- \n', '+++ \n']
+        first, last = group[0], group[-1]
+        out.append(f'@@ -{_hunk_range(offset + first[1], offset + last[2])} +{_hunk_range(offset + first[3], offset + last[4])} @@\n')
+
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                out += [' ' + line for line in a[i1:i2]]
+                continue
+            if tag in ('replace', 'delete'):
+                out += ['-' + line for line in a[i1:i2]]
+                lines_removed += i2 - i1
+            if tag in ('replace', 'insert'):
+                out += ['+' + line for line in b[j1:j2]]
+                lines_added += j2 - j1
+
+    return ''.join(out), lines_added, lines_removed
+
 
 @dataclass
 class EvolutionRecord:
@@ -22,7 +213,8 @@ class EvolutionRecord:
     timestamp: datetime
     author: str
     reason: str
-    diff: str
+    diff_preview: str  # first DIFF_PREVIEW_CHARS of the unified diff
+    diff_ref: Optional[str]  # document_diffs id of the full diff, if longer
     old_hash: str
     new_hash: str
     impact_score: float
@@ -40,13 +232,36 @@ class DocumentEvolutionSystem:
     """
 
     def __init__(self, project_id: str, gemini_api_key: str):
-        self.firestore_db = firestore.Client(project=project_id)
+        # AsyncClient binds to the event loop it first runs on, so it is not shared
+        self.firestore_db = firestore.AsyncClient(project=project_id)
         genai.configure(api_key=gemini_api_key)
         self.gemini_model = genai.GenerativeModel('gemini-pro')
 
+        # Insights are generated off the track_change path, in batches
+        self._insight_queue: asyncio.Queue = asyncio.Queue()
+        self._insight_worker: Optional[asyncio.Task] = None
+
         self.evolution_log = []
+
+        # Firestore writes are queued and committed together
+        self._write_batch = self.firestore_db.batch()
+        self._pending_writes = 0
+        self._batch_depth = 0
+
+        # Latest version per document, queued or committed, and reference
+        # counts of documents that predate document_reference_counts
+        self._versions: Dict[str, int] = {}
+        self._legacy_reference_counts: Dict[str, int] = {}
+
+        # Latest change record per recently changed document, in LRU order
+        self._latest_records: OrderedDict = OrderedDict()
+
+        self._dmp = None
+        if diff_match_patch is not None:
+            self._dmp = diff_match_patch()
+            self._dmp.Diff_Timeout = DIFF_TIMEOUT_SECONDS
         self.pattern_detector = PatternDetector(self.gemini_model)
-        self.quality_analyzer = QualityAnalyzer(self.gemini_model)
+        self.quality_analyzer = QualityAnalyzer(self.gemini_model, self.firestore_db)
 
     async def track_change(
         self,
@@ -59,25 +274,54 @@ class DocumentEvolutionSystem:
     ) -> EvolutionRecord:
         """Track and analyze document change"""
 
-        # Calculate diff
-        diff = list(difflib.unified_diff(
-            old_content.splitlines(keepends=True),
-            new_content.splitlines(keepends=True),
-            lineterm=''
-        ))
-
-        # Count changes
-        lines_added = sum(1 for line in diff if line.startswith('+'))
-        lines_removed = sum(1 for line in diff if line.startswith('-'))
+        old_hash = self._hash_content(old_content)
+        new_hash = self._hash_content(new_content)
+
+        # A re-submitted change is answered with the record it already produced
+        latest = self._latest_records.get(doc_id)
+        if latest is not None and (latest.old_hash, latest.new_hash) == (old_hash, new_hash):
+            return latest
+
+        # Nothing changed: no diff, Gemini calls, or writes
+        if old_hash == new_hash:
+            return EvolutionRecord(
+                doc_id=doc_id,
+                version=await self._get_next_version(doc_id) - 1,
+                timestamp=datetime.utcnow(),
+                author=author,
+                reason=reason,
+                diff_preview='',
+                diff_ref=None,
+                old_hash=old_hash,
+                new_hash=new_hash,
+                impact_score=0.0,
+                quality_delta=0.0,
+                change_type=change_type,
+                lines_added=0,
+                lines_removed=0,
+                files_affected=[doc_id]
+            )
+
+        # Calculate diff and count changes
+        diff, lines_added, lines_removed = self._diff(old_content, new_content)
 
         # Get version
         version = await self._get_next_version(doc_id)
 
         # Calculate impact and quality
-        impact_score = await self._calculate_impact(doc_id, new_content, diff)
-        quality_delta = await self.quality_analyzer.measure_quality_change(
-            old_content, new_content
-        )
+        impact_score = await self._calculate_impact(doc_id, new_content, lines_added + lines_removed)
+        diff_ratio = (lines_added + lines_removed) / max(len(old_content.splitlines()), 1)
+        if diff_ratio < TRIVIAL_DIFF_RATIO:
+            quality_delta = 0.0
+        else:
+            quality_delta = await self.quality_analyzer.measure_quality_change(
+                old_content, new_content
+            )
+
+        # Only the preview stays on the record; see load_full_diff
+        diff_ref = None
+        if len(diff) > DIFF_PREVIEW_CHARS:
+            diff_ref = await self._store_diff(doc_id, version, diff)
 
         # Create evolution record
         record = EvolutionRecord(
@@ -86,9 +330,10 @@ class DocumentEvolutionSystem:
             timestamp=datetime.utcnow(),
             author=author,
             reason=reason,
-            diff=''.join(diff),
-            old_hash=self._hash_content(old_content),
-            new_hash=self._hash_content(new_content),
+            diff_preview=diff[:DIFF_PREVIEW_CHARS],
+            diff_ref=diff_ref,
+            old_hash=old_hash,
+            new_hash=new_hash,
             impact_score=impact_score,
             quality_delta=quality_delta,
             change_type=change_type,
@@ -97,6 +342,11 @@ class DocumentEvolutionSystem:
             files_affected=[doc_id]
         )
 
+        self._latest_records[doc_id] = record
+        self._latest_records.move_to_end(doc_id)
+        if len(self._latest_records) > LATEST_RECORDS_SIZE:
+            self._latest_records.popitem(last=False)
+
         # Store in Firestore
         await self._store_evolution(record)
 
@@ -106,16 +356,87 @@ class DocumentEvolutionSystem:
         # Trigger pattern analysis
         await self.pattern_detector.analyze_pattern(record)
 
-        # Generate insights
-        await self._generate_insights(record)
+        # Generate insights in the background
+        self._generate_insights(record)
+
+        if not self._batch_depth:
+            await self.flush()
 
         return record
 
-    async def _calculate_impact(self, doc_id: str, new_content: str, diff: List[str]) -> float:
+    @asynccontextmanager
+    async def batched(self):
+        """
+        Group several track_change calls into as few Firestore commits as possible.
+
+            async with system.batched():
+                for change in changes:
+                    await system.track_change(...)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                await self.flush()
+
+    async def flush(self):
+        """Commit all queued Firestore writes"""
+        if self._pending_writes:
+            # Swap first so writes queued while the commit is in flight are kept
+            batch, self._write_batch = self._write_batch, self.firestore_db.batch()
+            self._pending_writes = 0
+            await batch.commit()
+
+    async def _queue_write(self, doc_ref, data: Dict, merge: bool = False):
+        """Add a document write to the current batch, committing it when full"""
+        self._write_batch.set(doc_ref, data, merge=merge)
+        self._pending_writes += 1
+        if self._pending_writes >= FIRESTORE_BATCH_LIMIT:
+            await self.flush()
+
+    def _diff(self, old_content: str, new_content: str) -> tuple:
+        """Line diff of two versions as (diff text, lines added, lines removed)"""
+
+        if self._dmp is None:
+            return _unified_diff(old_content, new_content)
+
+        # Myers diff over one character per distinct line
+        dmp = self._dmp
+        old_chars, new_chars, line_array = dmp.diff_linesToChars(old_content, new_content)
+        diffs = dmp.diff_main(old_chars, new_chars, False)
+
+        # Until expanded, the length of each op is its number of lines
+        codes = []
+        i = j = 0
+        for op, text in diffs:
+            n = len(text)
+            if op == dmp.DIFF_EQUAL:
+                codes.append(('equal', i, i + n, j, j + n))
+                i, j = i + n, j + n
+                continue
+            if op == dmp.DIFF_DELETE:
+                code = ('delete', i, i + n, j, j)
+                i += n
+            else:
+                code = ('insert', i, i, j, j + n)
+                j += n
+            if codes and codes[-1][0] in ('delete', 'insert') and codes[-1][0] != code[0]:
+                # An adjacent delete and insert is a replace
+                _, i1, _, j1, _ = codes.pop()
+                code = ('replace', i1, i, j1, j)
+            codes.append(code)
+
+        a = [line_array[ord(c)] for c in old_chars]
+        b = [line_array[ord(c)] for c in new_chars]
+        return _format_hunks(a, b, _group_opcodes(codes, DIFF_CONTEXT_LINES))
+
+    async def _calculate_impact(self, doc_id: str, new_content: str, lines_changed: int) -> float:
         """Calculate impact score of the change"""
 
         # Factors: size of change, importance of doc, downstream dependencies
-        change_size = len(diff) / max(len(new_content.splitlines()), 1)
+        change_size = lines_changed / max(len(new_content.splitlines()), 1)
 
         # Check if doc is referenced by others
         references = await self._count_references(doc_id)
@@ -126,40 +447,114 @@ class DocumentEvolutionSystem:
 
         return min(impact, 1.0)
 
+    async def add_reference(self, doc_id: str, referenced_doc: str):
+        """Record that doc_id references referenced_doc"""
+
+        await self._queue_write(self.firestore_db.collection('document_references').document(), {
+            'doc_id': doc_id,
+            'referenced_doc': referenced_doc,
+            'timestamp': datetime.utcnow()
+        })
+        await self._queue_write(
+            self.firestore_db.collection('document_reference_counts').document(referenced_doc),
+            {'count': firestore.Increment(1)},
+            merge=True,
+        )
+        if not self._batch_depth:
+            await self.flush()
+
     async def _count_references(self, doc_id: str) -> int:
         """Count how many other docs reference this one"""
-        refs = self.firestore_db.collection('document_references').where(
-            'referenced_doc', '==', doc_id
-        ).stream()
-        return len(list(refs))
+
+        snapshot = await self.firestore_db.collection('document_reference_counts').document(doc_id).get()
+        if snapshot.exists:
+            return snapshot.get('count')
+
+        # No counter yet; count any references stored without one on the server
+        if doc_id not in self._legacy_reference_counts:
+            result = await self.firestore_db.collection('document_references').where(
+                'referenced_doc', '==', doc_id
+            ).count().get()
+            self._legacy_reference_counts[doc_id] = result[0][0].value
+        return self._legacy_reference_counts[doc_id]
 
     def _hash_content(self, content: str) -> str:
         """Generate hash of content"""
-        import hashlib
-        return hashlib.sha256(content.encode()).hexdigest()
+        return hashlib.sha256(content.encode(), usedforsecurity=False).hexdigest()
 
     async def _get_next_version(self, doc_id: str) -> int:
         """Get next version number"""
+
+        # Versions are tracked in-process after one query per document; this
+        # also covers versions queued but not yet committed
+        if doc_id in self._versions:
+            return self._versions[doc_id] + 1
+
         query = self.firestore_db.collection('document_evolution').where(
             'doc_id', '==', doc_id
         ).order_by('version', direction=firestore.Query.DESCENDING).limit(1)
 
-        docs = list(query.stream())
+        docs = [doc async for doc in query.stream()]
         if docs:
             return docs[0].get('version') + 1
         return 1
 
-    async def _store_evolution(self, record: EvolutionRecord):
-        """Store evolution record in Firestore"""
-        doc_ref = self.firestore_db.collection('document_evolution').document()
-        doc_ref.set(asdict(record))
+    async def _store_diff(self, doc_id: str, version: int, diff: str) -> str:
+        """Queue the full diff of a change and return its document id"""
+        doc_ref = self.firestore_db.collection('document_diffs').document()
+        await self._queue_write(doc_ref, {'doc_id': doc_id, 'version': version, 'diff': diff})
+        return doc_ref.id
+
+    async def load_full_diff(self, record: EvolutionRecord) -> str:
+        """Fetch the complete unified diff of a change"""
 
-    async def _generate_insights(self, record: EvolutionRecord):
-        """Generate AI insights about the change"""
+        if record.diff_ref is None:
+            return record.diff_preview
 
-        prompt = f"""
-        Analyze this document change and provide insights:
+        snapshot = await self.firestore_db.collection('document_diffs').document(record.diff_ref).get()
+        return snapshot.get('diff')
 
+    async def _store_evolution(self, record: EvolutionRecord):
+        """Store evolution record in Firestore"""
+        doc_ref = self.firestore_db.collection('document_evolution').document()
+        await self._queue_write(doc_ref, asdict(record))
+        self._versions[record.doc_id] = record.version
+
+    def _generate_insights(self, record: EvolutionRecord):
+        """Queue the change for AI insights, starting the worker if needed"""
+
+        self._insight_queue.put_nowait(record)
+        if self._insight_worker is None or self._insight_worker.done():
+            self._insight_worker = asyncio.create_task(self._run_insight_worker())
+
+    async def wait_for_insights(self):
+        """Wait until insights for every tracked change are generated and stored"""
+        await self._insight_queue.join()
+        if not self._batch_depth:
+            await self.flush()
+
+    async def _run_insight_worker(self):
+        """Generate insights for up to INSIGHT_BATCH_SIZE queued changes per Gemini request"""
+
+        while True:
+            records = [await self._insight_queue.get()]
+            while len(records) < INSIGHT_BATCH_SIZE and not self._insight_queue.empty():
+                records.append(self._insight_queue.get_nowait())
+
+            try:
+                await self._generate_insight_batch(records)
+            except Exception:
+                # Insights are best-effort; the worker must outlive any failure
+                logger.exception("Insight generation failed for %d changes", len(records))
+            finally:
+                for _ in records:
+                    self._insight_queue.task_done()
+
+    async def _generate_insight_batch(self, records: List[EvolutionRecord]):
+        """Generate and store AI insights about several changes"""
+
+        changes = "\n".join(f"""
+        Change {i}:
         Document: {record.doc_id}
         Change Type: {record.change_type}
         Lines Added: {record.lines_added}
@@ -168,24 +563,35 @@ class DocumentEvolutionSystem:
         Quality Delta: {record.quality_delta}
 
         Diff:
-        {record.diff[:1000]}
+        {record.diff_preview}
+        """ for i, record in enumerate(records, 1))
 
-        Provide:
-        1. What improved?
-        2. What risks were introduced?
-        3. What could be better?
-        4. Patterns observed
-        """
+        response = await self.gemini_model.generate_content_async(
+            f"{INSIGHT_INSTRUCTION}\n\n{changes}"
+        )
 
-        response = self.gemini_model.generate_content(prompt)
+        try:
+            text = response.text
+        except ValueError:
+            return  # Blocked or empty response, nothing to store
+
+        try:
+            insights = json.loads(text)
+        except ValueError:
+            insights = None
+        if not isinstance(insights, list) or len(insights) != len(records):
+            insights = [text] * len(records)
 
         # Store insights
-        self.firestore_db.collection('document_insights').document().set({
-            'doc_id': record.doc_id,
-            'version': record.version,
-            'timestamp': datetime.utcnow(),
-            'insights': response.text
-        })
+        for record, text in zip(records, insights):
+            await self._queue_write(self.firestore_db.collection('document_insights').document(), {
+                'doc_id': record.doc_id,
+                'version': record.version,
+                'timestamp': datetime.utcnow(),
+                'insights': text
+            })
+        if not self._batch_depth:
+            await self.flush()
 
     async def get_document_history(self, doc_id: str, limit: int = 50) -> List[EvolutionRecord]:
         """Get full evolution history of a document"""
@@ -195,8 +601,12 @@ class DocumentEvolutionSystem:
         ).order_by('version', direction=firestore.Query.DESCENDING).limit(limit)
 
         records = []
-        for doc in query.stream():
+        async for doc in query.stream():
             data = doc.to_dict()
+            if 'diff' in data:
+                # Stored before diffs were split out; the whole diff is the preview
+                data['diff_preview'] = data.pop('diff')
+                data['diff_ref'] = None
             records.append(EvolutionRecord(**data))
 
         return records
@@ -204,52 +614,78 @@ class DocumentEvolutionSystem:
     async def get_evolution_report(self, period_days: int = 30) -> Dict:
         """Generate evolution report for period"""
 
-        start_date = datetime.utcnow() - timedelta(days=period_days)
-
-        query = self.firestore_db.collection('document_evolution').where(
-            'timestamp', '>=', start_date
-        ).stream()
-
-        evolutions = [EvolutionRecord(**doc.to_dict()) for doc in query]
-
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=period_days)
+
+        # Split the window into contiguous time ranges queried concurrently,
+        # so one slow range does not serialise the rest
+        shards = max(1, min(period_days, MAX_REPORT_SHARDS))
+        step = (end_date - start_date) / shards
+        bounds = [start_date + step * i for i in range(shards)] + [end_date]
+
+        # One column per report field, filled in a single pass over the raw
+        # documents without building EvolutionRecords
+        columns = {field: [] for field in REPORT_FIELDS}
+
+        async def _scan_range(lower: datetime, upper: Optional[datetime]):
+            query = self.firestore_db.collection('document_evolution').where('timestamp', '>=', lower)
+            if upper is not None:
+                query = query.where('timestamp', '<', upper)
+            async for doc in query.stream():
+                evolution = doc.to_dict()
+                for field, column in columns.items():
+                    column.append(evolution[field])
+
+        # The last range is open-ended so records written during the report are kept
+        await asyncio.gather(*[
+            _scan_range(bounds[i], bounds[i + 1] if i + 1 < shards else None)
+            for i in range(shards)
+        ])
+
+        deltas = columns['quality_delta']
+        top_contributors, _ = _most_common(columns['author'])
+        most_evolved, documents_changed = _most_common(columns['doc_id'])
         return {
             'period_days': period_days,
-            'total_changes': len(evolutions),
-            'documents_changed': len(set(e.doc_id for e in evolutions)),
-            'total_lines_added': sum(e.lines_added for e in evolutions),
-            'total_lines_removed': sum(e.lines_removed for e in evolutions),
-            'avg_quality_delta': sum(e.quality_delta for e in evolutions) / len(evolutions) if evolutions else 0,
-            'top_contributors': self._get_top_contributors(evolutions),
-            'most_evolved_docs': self._get_most_evolved(evolutions),
-            'quality_trend': await self._calculate_quality_trend(evolutions)
+            'total_changes': len(deltas),
+            'documents_changed': documents_changed,
+            'total_lines_added': sum(columns['lines_added']),
+            'total_lines_removed': sum(columns['lines_removed']),
+            'avg_quality_delta': sum(deltas) / len(deltas) if deltas else 0,
+            'top_contributors': self._get_top_contributors(top_contributors),
+            'most_evolved_docs': self._get_most_evolved(most_evolved),
+            'quality_trend': await self._calculate_quality_trend(columns['timestamp'], deltas)
         }
 
-    def _get_top_contributors(self, evolutions: List[EvolutionRecord]) -> List[Dict]:
-        """Get top contributors"""
-        from collections import Counter
-        authors = Counter(e.author for e in evolutions)
-        return [{'author': author, 'changes': count} for author, count in authors.most_common(10)]
-
-    def _get_most_evolved(self, evolutions: List[EvolutionRecord]) -> List[Dict]:
-        """Get most frequently changed documents"""
-        from collections import Counter
-        docs = Counter(e.doc_id for e in evolutions)
-        return [{'doc_id': doc, 'changes': count} for doc, count in docs.most_common(10)]
-
-    async def _calculate_quality_trend(self, evolutions: List[EvolutionRecord]) -> List[Dict]:
-        """Calculate quality trend over time"""
-
-        sorted_evolutions = sorted(evolutions, key=lambda e: e.timestamp)
-
-        trend = []
-        for i, evolution in enumerate(sorted_evolutions):
-            trend.append({
-                'timestamp': evolution.timestamp.isoformat(),
-                'quality_delta': evolution.quality_delta,
-                'cumulative_quality': sum(e.quality_delta for e in sorted_evolutions[:i+1])
-            })
+    def _get_top_contributors(self, authors: List[tuple]) -> List[Dict]:
+        """Get top contributors from (author, changes) pairs"""
+        return [{'author': author, 'changes': count} for author, count in authors]
+
+    def _get_most_evolved(self, docs: List[tuple]) -> List[Dict]:
+        """Get most frequently changed documents from (doc_id, changes) pairs"""
+        return [{'doc_id': doc, 'changes': count} for doc, count in docs]
+
+    async def _calculate_quality_trend(self, timestamps: List[datetime], deltas: List[float]) -> List[Dict]:
+        """Calculate quality trend over time from timestamp and quality delta columns"""
+
+        order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
 
-        return trend
+        if np is not None:
+            sorted_deltas = np.asarray(deltas, dtype=np.float64)[order]
+            cumulative = np.cumsum(sorted_deltas).tolist()
+            sorted_deltas = sorted_deltas.tolist()
+        else:
+            sorted_deltas = [deltas[i] for i in order]
+            cumulative = list(accumulate(sorted_deltas))
+
+        return [
+            {
+                'timestamp': timestamps[i].isoformat(),
+                'quality_delta': delta,
+                'cumulative_quality': total
+            }
+            for i, delta, total in zip(order, sorted_deltas, cumulative)
+        ]
 
 
 class PatternDetector:
@@ -294,9 +730,13 @@ class PatternDetector:
 class QualityAnalyzer:
     """Analyzes document quality"""
 
-    def __init__(self, gemini_model):
+    def __init__(self, gemini_model, firestore_db):
         self.gemini_model = gemini_model
 
+        # Scores are cached by exact excerpt hash, in memory and in Firestore
+        self._cache = firestore_db.collection('quality_cache')
+        self._scores: Dict[str, float] = {}
+
     async def measure_quality_change(self, old_content: str, new_content: str) -> float:
         """Measure quality delta between versions"""
 
@@ -308,28 +748,35 @@ class QualityAnalyzer:
     async def _assess_quality(self, content: str) -> float:
         """Assess quality of content (0-1 scale)"""
 
-        prompt = f"""
-        Assess the quality of this document on a scale of 0-1:
-
-        {content[:2000]}
-
-        Consider:
-        - Clarity and readability
-        - Completeness
-        - Accuracy
-        - Structure
-        - Actionability
+        excerpt = content[:2000]
+        key = hashlib.sha256(excerpt.encode()).hexdigest()
+        if key in self._scores:
+            return self._scores[key]
 
-        Return only a number between 0 and 1.
-        """
+        prompt = f"{QUALITY_INSTRUCTION}\n\n{excerpt}"
 
         try:
+            snapshot = await self._cache.document(key).get()
+            if snapshot.exists:
+                self._scores[key] = snapshot.get('quality')
+                return self._scores[key]
+
             response = self.gemini_model.generate_content(prompt)
             quality = float(response.text.strip())
-            return max(0.0, min(1.0, quality))
-        except:
+            quality = max(0.0, min(1.0, quality))
+        except Exception:
             return 0.5  # Default neutral quality
 
+        self._scores[key] = quality
+        try:
+            await self._cache.document(key).set({
+                'quality': quality,
+                'expires_at': datetime.utcnow() + QUALITY_CACHE_TTL,
+            })
+        except google_exceptions.GoogleAPIError:
+            pass  # the score is still valid, just not shared
+
+        return quality
 
 if __name__ == "__main__":
     import asyncio
@@ -352,4 +799,6 @@ if __name__ == "__main__":
         print(f"Tracked change v{record.version}: {record.doc_id}")
         print(f"Impact: {record.impact_score:.2f}, Quality Δ: {record.quality_delta:.2f}")
 
+        await system.wait_for_insights()
+
     asyncio.run(main())
@@ -4,14 +4,51 @@ Indexes all entities: properties, documents, agents, tasks, intelligence
 Real-time relationship mapping and semantic search
 """
 
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from typing import Dict, List, Any, Optional
 from datetime import datetime
+import hashlib
 import json
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase
 from google.cloud import firestore
 import numpy as np
 
 
+# Queued Firestore writes are committed at this size, under the 500-op cap
+FIRESTORE_BATCH_LIMIT = 400
+
+# Queued Neo4j nodes of one label are merged with a single UNWIND at this size
+NEO4J_BATCH_SIZE = 500
+
+# Properties are linked to neighborhoods within this distance
+NEIGHBORHOOD_RADIUS_METERS = 5000
+
+# Embeddings kept in memory; older ones are re-read from Firestore's
+# embedding_cache collection. Both hold L2-normalised float16 vectors, so
+# cosine similarity is a plain dot product at half the float32 footprint
+EMBEDDING_CACHE_SIZE = 16384
+EMBEDDING_MODEL = "textembedding-gecko@003"
+
+
+@lru_cache(maxsize=None)
+def _entity_graph_query(label: str, depth: int) -> str:
+    """Path query text, built once per label and depth since neither can be a parameter"""
+    return f"""
+            MATCH path = (start:{label} {{id: $entity_id}})-[*1..{depth}]-(connected)
+            RETURN path
+            """
+
+
+@lru_cache(maxsize=None)
+def _embedding_model():
+    """Load the Vertex AI embedding model once per process"""
+    from vertexai.language_models import TextEmbeddingModel
+    return TextEmbeddingModel.from_pretrained(EMBEDDING_MODEL)
+
+
 class MasterIndexSystem:
     """
     Central nervous system for all data and relationships
@@ -19,8 +56,11 @@ class MasterIndexSystem:
     """
 
     def __init__(self, neo4j_uri: str, firestore_project: str):
-        self.neo4j_driver = GraphDatabase.driver(neo4j_uri)
-        self.firestore_db = firestore.Client(project=firestore_project)
+        # Async clients bind to the event loop they first run on, so each
+        # instance owns its own rather than sharing them process-wide
+        self.neo4j_driver = AsyncGraphDatabase.driver(neo4j_uri)
+        self.firestore_db = firestore.AsyncClient(project=firestore_project)
+        self._point_index_ready = False
 
         # Index registries
         self.indices = {
@@ -33,41 +73,135 @@ class MasterIndexSystem:
             'prompts': PromptIndex(self.neo4j_driver, self.firestore_db)
         }
 
-        self.embedding_cache = {}
+        # LRU of embeddings keyed by the SHA-256 of their text
+        self.embedding_cache: OrderedDict = OrderedDict()
+
+        # Firestore writes are queued and committed together
+        self._write_batch = self.firestore_db.batch()
+        self._pending_writes = 0
+        self._batch_depth = 0
+
+        # Neo4j nodes per entity type, and relationship discovery that has
+        # to wait until those nodes exist
+        self._pending_nodes: Dict[str, List[Dict]] = {}
+        self._pending_relationships: List[tuple] = []
 
-    def index_entity(self, entity_type: str, entity_id: str, data: Dict) -> bool:
+    async def index_entity(self, entity_type: str, entity_id: str, data: Dict) -> bool:
         """Index any entity with full relationship mapping"""
 
         if entity_type not in self.indices:
             raise ValueError(f"Unknown entity type: {entity_type}")
 
-        index = self.indices[entity_type]
-
-        # Create node in Neo4j
-        node_id = index.create_node(entity_id, data)
+        # Create node in Neo4j, merged together with the rest of the batch
+        await self._queue_node(entity_type, entity_id, data)
 
         # Store full data in Firestore
         doc_ref = self.firestore_db.collection(entity_type).document(entity_id)
-        doc_ref.set({
+        await self._queue_write(doc_ref, {
             **data,
             'indexed_at': datetime.utcnow(),
-            'node_id': node_id
+            'node_id': entity_id
         })
 
-        # Auto-discover relationships
-        self._discover_relationships(entity_type, entity_id, data)
+        # Auto-discover relationships once the node has been created
+        self._pending_relationships.append((entity_type, entity_id, data))
+
+        if not self._batch_depth:
+            await self.flush()
 
         return True
 
-    def search(self, query: str, entity_types: Optional[List[str]] = None,
-               limit: int = 20) -> List[Dict]:
+    async def index_entities(self, entity_type: str, entities: Dict[str, Dict]) -> bool:
+        """Index many entities of one type, keyed by entity id, in as few round-trips as possible"""
+
+        async with self.batched():
+            for entity_id, data in entities.items():
+                await self.index_entity(entity_type, entity_id, data)
+
+        return True
+
+    @asynccontextmanager
+    async def batched(self):
+        """
+        Group several index_entity calls into as few Firestore commits as possible.
+
+            async with index_system.batched():
+                for entity_id, data in properties.items():
+                    await index_system.index_entity('properties', entity_id, data)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                await self.flush()
+
+    async def flush(self):
+        """Create all queued Neo4j nodes and relationships and commit all queued Firestore writes"""
+
+        nodes, self._pending_nodes = self._pending_nodes, {}
+        relationships, self._pending_relationships = self._pending_relationships, []
+        writes = [self._write_graph(nodes, relationships)]
+
+        if self._pending_writes:
+            # Swap first so writes queued while the commit is in flight are kept
+            batch, self._write_batch = self._write_batch, self.firestore_db.batch()
+            self._pending_writes = 0
+            writes.append(batch.commit())
+
+        # Firestore documents don't depend on the graph, so both go out at once
+        await asyncio.gather(*writes)
+
+    async def _write_graph(self, nodes: Dict[str, List[Dict]], relationships: List[tuple]):
+        """Create queued nodes, one UNWIND per entity type, then their relationships"""
+
+        await asyncio.gather(*[
+            self.indices[entity_type].create_nodes_bulk(rows)
+            for entity_type, rows in nodes.items()
+        ])
+
+        if relationships:
+            await self._ensure_point_index()
+            async with self.neo4j_driver.session() as session:
+                for entity_type, entity_id, data in relationships:
+                    await self._discover_relationships(session, entity_type, entity_id, data)
+
+    async def _ensure_point_index(self):
+        """Create the spatial index behind neighborhood lookups"""
+        if self._point_index_ready:
+            return
+        async with self.neo4j_driver.session() as session:
+            await session.run("""
+                CREATE POINT INDEX neighborhood_location IF NOT EXISTS
+                FOR (n:Neighborhood) ON (n.location)
+            """)
+        self._point_index_ready = True
+
+    async def _queue_node(self, entity_type: str, entity_id: str, data: Dict):
+        """Add a node to the pending UNWIND for its type, running it when full"""
+        rows = self._pending_nodes.setdefault(entity_type, [])
+        rows.append({'id': entity_id, 'properties': data})
+        if len(rows) >= NEO4J_BATCH_SIZE:
+            del self._pending_nodes[entity_type]
+            await self.indices[entity_type].create_nodes_bulk(rows)
+
+    async def _queue_write(self, doc_ref, data: Dict):
+        """Add a document write to the current batch, committing it when full"""
+        self._write_batch.set(doc_ref, data)
+        self._pending_writes += 1
+        if self._pending_writes >= FIRESTORE_BATCH_LIMIT:
+            await self.flush()
+
+    async def search(self, query: str, entity_types: Optional[List[str]] = None,
+                     limit: int = 20) -> List[Dict]:
         """
         Universal semantic search across all indexed entities
         Natural language query support
         """
 
         # Generate query embedding
-        query_embedding = self._generate_embedding(query)
+        query_embedding = await self._generate_embedding(query)
 
         # Search across specified indices or all
         search_indices = entity_types if entity_types else self.indices.keys()
@@ -90,15 +224,16 @@ class MasterIndexSystem:
 
         return ranked_results[:limit]
 
-    def get_entity_graph(self, entity_type: str, entity_id: str, depth: int = 2) -> Dict:
+    async def get_entity_graph(self, entity_type: str, entity_id: str, depth: int = 2) -> Dict:
         """Get entity with all relationships up to specified depth"""
 
-        with self.neo4j_driver.session() as session:
-            query = f"""
-            MATCH path = (start:{entity_type} {{id: $entity_id}})-[*1..{depth}]-(connected)
-            RETURN path
-            """
-            result = session.run(query, entity_id=entity_id)
+        if entity_type not in self.indices:
+            raise ValueError(f"Unknown entity type: {entity_type}")
+
+        query = _entity_graph_query(self.indices[entity_type].label, int(depth))
+
+        async with self.neo4j_driver.session() as session:
+            result = await session.run(query, entity_id=entity_id)
 
             # Build graph structure
             graph = {
@@ -107,7 +242,7 @@ class MasterIndexSystem:
                 'edges': []
             }
 
-            for record in result:
+            async for record in result:
                 path = record['path']
                 for node in path.nodes:
                     graph['nodes'].append({
@@ -126,74 +261,100 @@ class MasterIndexSystem:
 
             return graph
 
-    def _discover_relationships(self, entity_type: str, entity_id: str, data: Dict):
+    async def _discover_relationships(self, session, entity_type: str, entity_id: str, data: Dict):
         """AI-powered relationship discovery"""
 
         # Find potential relationships based on data patterns
-        with self.neo4j_driver.session() as session:
-            # Example: Link properties to neighborhoods
-            if entity_type == 'properties':
-                session.run("""
-                    MATCH (p:Property {id: $entity_id})
-                    MATCH (n:Neighborhood)
-                    WHERE point.distance(p.location, n.location) < 5000
-                    MERGE (p)-[:LOCATED_IN]->(n)
-                """, entity_id=entity_id)
-
-            # Example: Link documents to related properties
-            elif entity_type == 'documents':
-                if 'property_id' in data:
-                    session.run("""
-                        MATCH (d:Document {id: $doc_id})
-                        MATCH (p:Property {id: $property_id})
-                        MERGE (d)-[:RELATED_TO]->(p)
-                    """, doc_id=entity_id, property_id=data['property_id'])
-
-    def _generate_embedding(self, text: str) -> np.ndarray:
-        """Generate embedding vector for semantic search"""
-
-        if text in self.embedding_cache:
-            return self.embedding_cache[text]
-
-        # Use Vertex AI embeddings
-        from vertexai.language_models import TextEmbeddingModel
-
-        model = TextEmbeddingModel.from_pretrained("textembedding-gecko@003")
-        embedding = model.get_embeddings([text])[0].values
-
-        self.embedding_cache[text] = np.array(embedding)
-        return self.embedding_cache[text]
-
-    def get_index_stats(self) -> Dict:
+        # Example: Link properties to neighborhoods
+        if entity_type == 'properties':
+            # With p bound first, the distance filter is a seek on the
+            # neighborhood_location point index instead of a label scan
+            await session.run("""
+                MATCH (p:Property {id: $entity_id})
+                WITH p
+                MATCH (n:Neighborhood)
+                WHERE point.distance(n.location, p.location) < $radius
+                MERGE (p)-[:LOCATED_IN]->(n)
+            """, entity_id=entity_id, radius=NEIGHBORHOOD_RADIUS_METERS)
+
+        # Example: Link documents to related properties
+        elif entity_type == 'documents':
+            if 'property_id' in data:
+                await session.run("""
+                    MATCH (d:Document {id: $doc_id})
+                    MATCH (p:Property {id: $property_id})
+                    MERGE (d)-[:RELATED_TO]->(p)
+                """, doc_id=entity_id, property_id=data['property_id'])
+
+    async def _generate_embedding(self, text: str) -> np.ndarray:
+        """Generate unit-length float16 embedding vector for semantic search"""
+
+        key = hashlib.sha256(text.encode()).hexdigest()
+        if key in self.embedding_cache:
+            self.embedding_cache.move_to_end(key)
+            return self.embedding_cache[key]
+
+        doc_ref = self.firestore_db.collection('embedding_cache').document(key)
+        snapshot = await doc_ref.get()
+        if snapshot.exists:
+            embedding = np.frombuffer(snapshot.get('vector'), dtype=np.float16)
+        else:
+            # Use Vertex AI embeddings
+            result = await _embedding_model().get_embeddings_async([text])
+            values = np.asarray(result[0].values, dtype=np.float32)
+            embedding = (values / np.linalg.norm(values)).astype(np.float16)
+            await doc_ref.set({
+                'vector': embedding.tobytes(),
+                'model': EMBEDDING_MODEL,
+                'created_at': datetime.utcnow()
+            })
+
+        self.embedding_cache[key] = embedding
+        if len(self.embedding_cache) > EMBEDDING_CACHE_SIZE:
+            self.embedding_cache.popitem(last=False)
+        return embedding
+
+    async def get_index_stats(self) -> Dict:
         """Get statistics for all indices"""
 
-        stats = {}
-        for name, index in self.indices.items():
-            stats[name] = {
-                'total_entities': index.count(),
-                'last_indexed': index.get_last_indexed_time()
-            }
+        async def _stats(index: 'BaseIndex') -> Dict:
+            total, last = await asyncio.gather(index.count(), index.get_last_indexed_time())
+            return {'total_entities': total, 'last_indexed': last}
 
-        return stats
+        results = await asyncio.gather(*[_stats(index) for index in self.indices.values()])
+        return dict(zip(self.indices, results))
 
 
 class BaseIndex:
     """Base class for all index types"""
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # Labels cannot be query parameters; building each index's query text
+        # once keeps it identical across calls for Neo4j's plan cache
+        cls.label = cls.__name__.replace('Index', '').lower().capitalize()
+        cls.merge_query = f"""
+                UNWIND $rows AS row
+                MERGE (n:{cls.label} {{id: row.id}})
+                SET n += row.properties
+            """
+        cls.count_query = f"MATCH (n:{cls.label}) RETURN count(n) as count"
+
     def __init__(self, neo4j_driver, firestore_db):
         self.neo4j_driver = neo4j_driver
         self.firestore_db = firestore_db
         self.index_name = self.__class__.__name__.replace('Index', '').lower()
 
-    def create_node(self, entity_id: str, data: Dict) -> str:
+    async def create_node(self, entity_id: str, data: Dict) -> str:
         """Create node in Neo4j"""
-        with self.neo4j_driver.session() as session:
-            result = session.run(f"""
-                MERGE (n:{self.index_name.capitalize()} {{id: $entity_id}})
-                SET n += $properties
-                RETURN n
-            """, entity_id=entity_id, properties=data)
-            return entity_id
+        return (await self.create_nodes_bulk([{'id': entity_id, 'properties': data}]))[0]
+
+    async def create_nodes_bulk(self, rows: List[Dict]) -> List[str]:
+        """Create nodes from {'id', 'properties'} rows with one UNWIND query in one session"""
+        async with self.neo4j_driver.session() as session:
+            await session.run(self.merge_query, rows=rows)
+        return [row['id'] for row in rows]
 
     def similarity_search(self, query_embedding: np.ndarray, limit: int = 10) -> List[Dict]:
         """Semantic similarity search"""
@@ -201,19 +362,19 @@ class BaseIndex:
         # This would use a vector database like Pinecone or Weaviate
         pass
 
-    def count(self) -> int:
+    async def count(self) -> int:
         """Count total entities"""
-        with self.neo4j_driver.session() as session:
-            result = session.run(f"MATCH (n:{self.index_name.capitalize()}) RETURN count(n) as count")
-            return result.single()['count']
+        async with self.neo4j_driver.session() as session:
+            result = await session.run(self.count_query)
+            return (await result.single())['count']
 
-    def get_last_indexed_time(self) -> Optional[datetime]:
+    async def get_last_indexed_time(self) -> Optional[datetime]:
         """Get timestamp of last indexed entity"""
         doc_ref = self.firestore_db.collection(self.index_name).order_by(
             'indexed_at', direction=firestore.Query.DESCENDING
         ).limit(1)
 
-        docs = list(doc_ref.stream())
+        docs = [doc async for doc in doc_ref.stream()]
         if docs:
             return docs[0].get('indexed_at')
         return None
@@ -255,23 +416,26 @@ class PromptIndex(BaseIndex):
 
 
 if __name__ == "__main__":
-    # Initialize master index
-    index_system = MasterIndexSystem(
-        neo4j_uri="bolt://localhost:7687",
-        firestore_project="real-estate-intelligence"
-    )
-
-    # Example: Index a property
-    property_data = {
-        'address': '123 Main St',
-        'price': 500000,
-        'bedrooms': 3,
-        'bathrooms': 2,
-        'location': {'lat': 40.7128, 'lng': -74.0060}
-    }
-
-    index_system.index_entity('properties', 'prop_001', property_data)
-
-    # Example: Search
-    results = index_system.search("3 bedroom house in downtown")
-    print(f"Found {len(results)} results")
+    async def main():
+        # Initialize master index
+        index_system = MasterIndexSystem(
+            neo4j_uri="bolt://localhost:7687",
+            firestore_project="real-estate-intelligence"
+        )
+
+        # Example: Index a property
+        property_data = {
+            'address': '123 Main St',
+            'price': 500000,
+            'bedrooms': 3,
+            'bathrooms': 2,
+            'location': {'lat': 40.7128, 'lng': -74.0060}
+        }
+
+        await index_system.index_entity('properties', 'prop_001', property_data)
+
+        # Example: Search
+        results = await index_system.search("3 bedroom house in downtown")
+        print(f"Found {len(results)} results")
+
+    asyncio.run(main())
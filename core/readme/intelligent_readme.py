@@ -4,13 +4,80 @@ Auto-generates and maintains comprehensive README files
 Learns from project structure and updates automatically
 """
 
+from collections import OrderedDict
+from contextlib import contextmanager
 from typing import Dict, List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
+import hashlib
 import json
+import os
+import re
 import google.generativeai as genai
 from google.cloud import firestore
 
+try:
+    import orjson
+
+    _loads = orjson.loads
+
+    def _dumps_pretty(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:  # orjson is optional
+    _loads = json.loads
+
+    def _dumps_pretty(obj) -> str:
+        return json.dumps(obj, indent=2)
+
+
+# Queued Firestore writes are committed at this size, under the 500-op cap
+FIRESTORE_BATCH_LIMIT = 400
+
+# Gemini responses kept in memory; older ones are re-read from Firestore's
+# ai_response_cache collection, whose expires_at field drives a TTL policy
+AI_RESPONSE_CACHE_SIZE = 512
+AI_RESPONSE_CACHE_TTL = timedelta(days=7)
+
+# File name fragments that mark a key file, and the project trait they indicate
+KEY_FILE_PATTERNS = {
+    'package.json': 'node_project',
+    'requirements.txt': 'python_project',
+    'Dockerfile': 'docker_project',
+    'docker-compose.yml': 'docker_compose',
+    'pyproject.toml': 'python_poetry',
+    '.env.example': 'env_config',
+    'terraform': 'infrastructure'
+}
+
+# Framework -> (relative path, marker); 'dir' means the path must be a directory,
+# 'substr:<text>' means the file must contain <text>
+FRAMEWORK_MARKERS = {
+    'react': ('node_modules/react', 'dir'),
+    'vue': ('node_modules/vue', 'dir'),
+    'angular': ('node_modules/@angular', 'dir'),
+    'flask': ('requirements.txt', 'substr:flask'),
+    'fastapi': ('requirements.txt', 'substr:fastapi'),
+    'django': ('requirements.txt', 'substr:django')
+}
+
+# Marks a directory whose README is regenerated by update_all_readmes
+WATCHER_FILENAME = '.readme_watcher.json'
+
+# Directories never searched for README watchers
+_SKIP_DIRS = frozenset({'.git', 'node_modules', '__pycache__', 'venv', '.venv', 'dist', 'build'})
+
+# One alternation per marker file, so each file is scanned once for all of its
+# substring markers
+_MARKER_PATTERNS = {
+    relative_path: re.compile('|'.join(
+        re.escape(other_marker[len('substr:'):])
+        for other_path, other_marker in FRAMEWORK_MARKERS.values()
+        if other_path == relative_path and other_marker.startswith('substr:')
+    ))
+    for relative_path, marker in FRAMEWORK_MARKERS.values()
+    if marker.startswith('substr:')
+}
+
 
 class IntelligentReadmeSystem:
     """
@@ -26,6 +93,17 @@ class IntelligentReadmeSystem:
 
         self.readme_templates = self._load_templates()
 
+        # Firestore writes are queued and committed together
+        self._write_batch = self.firestore_db.batch()
+        self._pending_writes = 0
+        self._batch_depth = 0
+
+        # Gemini responses by prompt hash, least recently used first
+        self._responses: OrderedDict = OrderedDict()
+
+        # Directory -> (mtime_ns, subdirectories, has watcher) from the last watcher search
+        self._watcher_dirs: Dict[str, tuple] = {}
+
     async def generate_readme(
         self,
         target_path: Optional[str] = None,
@@ -38,33 +116,75 @@ class IntelligentReadmeSystem:
         else:
             target_path = Path(target_path)
 
-        # Scan project structure
-        structure = await self._scan_directory(target_path)
-
-        # Analyze code and dependencies
-        analysis = await self._analyze_project(target_path)
+        # Scan project structure and analyze code and dependencies in one pass
+        structure, analysis = await self._scan_and_analyze(target_path)
 
         # Generate README content
-        readme_content = await self._generate_content(
+        body = await self._generate_content(
             path=target_path,
             structure=structure,
             analysis=analysis
         )
+        content_hash = hashlib.blake2b(body.encode(), digest_size=16).hexdigest()
 
-        # Write README
+        # Write README, unless it already holds this exact generated text
         readme_path = target_path / "README.md"
-        readme_path.write_text(readme_content)
+        previous_hash = self._read_watcher(target_path).get('content_hash')
+        if content_hash == previous_hash and readme_path.exists():
+            readme_content = readme_path.read_text()
+        else:
+            # Add auto-generation notice
+            readme_content = f"""<!-- AUTO-GENERATED README -->
+<!-- Generated: {datetime.utcnow().isoformat()} -->
+<!-- System: Intelligent README Generator -->
+
+""" + body
+            readme_path.write_text(readme_content)
 
         # Track generation
-        await self._track_generation(str(target_path), readme_content)
+        await self._track_generation(str(target_path), content_hash, len(readme_content))
 
         if auto_update:
-            await self._setup_auto_update(target_path)
+            await self._setup_auto_update(target_path, content_hash)
+
+        if not self._batch_depth:
+            self.flush()
 
         return readme_content
 
-    async def _scan_directory(self, path: Path) -> Dict:
-        """Scan directory structure"""
+    @contextmanager
+    def batched(self):
+        """
+        Group several README generations into as few Firestore commits as possible.
+
+            with readme_system.batched():
+                for directory in directories:
+                    await readme_system.generate_readme(directory)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.flush()
+
+    def flush(self):
+        """Commit all queued Firestore writes"""
+        if self._pending_writes:
+            self._write_batch.commit()
+            self._write_batch = self.firestore_db.batch()
+            self._pending_writes = 0
+
+    def _queue_write(self, doc_ref, data: Dict):
+        """Add a document write to the current batch, committing it when full"""
+        self._write_batch.set(doc_ref, data)
+        self._pending_writes += 1
+        if self._pending_writes >= FIRESTORE_BATCH_LIMIT:
+            self.flush()
+
+    async def _scan_and_analyze(self, path: Path):
+        """Scan directory structure and analyze the project from a single directory listing"""
 
         structure = {
             'path': str(path),
@@ -74,33 +194,33 @@ class IntelligentReadmeSystem:
             'key_files': {}
         }
 
-        # Identify key files
-        key_patterns = {
-            'package.json': 'node_project',
-            'requirements.txt': 'python_project',
-            'Dockerfile': 'docker_project',
-            'docker-compose.yml': 'docker_compose',
-            'pyproject.toml': 'python_poetry',
-            '.env.example': 'env_config',
-            'terraform': 'infrastructure'
-        }
+        # scandir entries carry their type, so no extra stat per file
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    structure['files'].append(entry.name)
 
-        for item in path.iterdir():
-            if item.is_file():
-                structure['files'].append(item.name)
+                    # Check for key files
+                    for pattern, type in KEY_FILE_PATTERNS.items():
+                        if pattern in entry.name:
+                            structure['key_files'][type] = entry.path
 
-                # Check for key files
-                for pattern, type in key_patterns.items():
-                    if pattern in item.name:
-                        structure['key_files'][type] = str(item)
+                elif entry.is_dir() and not entry.name.startswith('.'):
+                    structure['directories'].append(entry.name)
 
-            elif item.is_dir() and not item.name.startswith('.'):
-                structure['directories'].append(item.name)
+        files = set(structure['files'])
+        directories = set(structure['directories'])
 
-        return structure
+        # Key file contents, each read at most once
+        texts = {}
 
-    async def _analyze_project(self, path: Path) -> Dict:
-        """Analyze project characteristics"""
+        def read_text(name: str) -> str:
+            if name not in texts:
+                try:
+                    texts[name] = (path / name).read_text() if name in files else ''
+                except (OSError, ValueError):
+                    texts[name] = ''
+            return texts[name]
 
         analysis = {
             'type': 'unknown',
@@ -112,90 +232,87 @@ class IntelligentReadmeSystem:
         }
 
         # Detect project type
-        if (path / 'package.json').exists():
+        if 'package.json' in files:
             analysis['type'] = 'javascript/typescript'
-            analysis['dependencies'] = self._parse_package_json(path / 'package.json')
+            analysis['dependencies'] = self._parse_package_json(read_text('package.json'))
 
-        if (path / 'requirements.txt').exists():
+        if 'requirements.txt' in files:
             analysis['type'] = 'python'
-            analysis['dependencies'] = self._parse_requirements(path / 'requirements.txt')
+            analysis['dependencies'] = self._parse_requirements(read_text('requirements.txt'))
 
-        if (path / 'docker-compose.yml').exists():
-            analysis['services'] = await self._parse_docker_compose(path / 'docker-compose.yml')
+        if 'docker-compose.yml' in files:
+            analysis['services'] = await self._parse_docker_compose(read_text('docker-compose.yml'))
 
         # Detect frameworks
-        analysis['frameworks'] = await self._detect_frameworks(path)
+        analysis['frameworks'] = self._detect_frameworks(path, directories, read_text)
 
-        return analysis
+        return structure, analysis
 
-    def _parse_package_json(self, file_path: Path) -> List[str]:
+    def _parse_package_json(self, text: str) -> List[str]:
         """Parse package.json dependencies"""
         try:
-            data = json.loads(file_path.read_text())
+            data = _loads(text)
             deps = list(data.get('dependencies', {}).keys())
             deps.extend(data.get('devDependencies', {}).keys())
             return deps
         except:
             return []
 
-    def _parse_requirements(self, file_path: Path) -> List[str]:
+    def _parse_requirements(self, text: str) -> List[str]:
         """Parse requirements.txt"""
-        try:
-            return [
-                line.split('==')[0].split('>=')[0].strip()
-                for line in file_path.read_text().splitlines()
-                if line.strip() and not line.startswith('#')
-            ]
-        except:
-            return []
+        return [
+            line.split('==')[0].split('>=')[0].strip()
+            for line in text.splitlines()
+            if line.strip() and not line.startswith('#')
+        ]
 
-    async def _parse_docker_compose(self, file_path: Path) -> List[str]:
+    async def _parse_docker_compose(self, text: str) -> List[str]:
         """Parse docker-compose services"""
         try:
             import yaml
-            data = yaml.safe_load(file_path.read_text())
+            data = yaml.safe_load(text)
             return list(data.get('services', {}).keys())
         except:
             return []
 
-    async def _detect_frameworks(self, path: Path) -> List[str]:
-        """Detect frameworks used"""
+    def _detect_frameworks(self, path: Path, directories: set, read_text) -> List[str]:
+        """Detect frameworks used from the scanned directories and cached key file texts"""
         frameworks = []
 
-        # Check for common frameworks
-        checks = {
-            'react': lambda: (path / 'node_modules' / 'react').exists(),
-            'vue': lambda: (path / 'node_modules' / 'vue').exists(),
-            'angular': lambda: (path / 'node_modules' / '@angular').exists(),
-            'flask': lambda: 'flask' in str((path / 'requirements.txt').read_text() if (path / 'requirements.txt').exists() else ''),
-            'fastapi': lambda: 'fastapi' in str((path / 'requirements.txt').read_text() if (path / 'requirements.txt').exists() else ''),
-            'django': lambda: 'django' in str((path / 'requirements.txt').read_text() if (path / 'requirements.txt').exists() else '')
+        found = {
+            relative_path: set(pattern.findall(read_text(relative_path)))
+            for relative_path, pattern in _MARKER_PATTERNS.items()
         }
 
-        for framework, check in checks.items():
-            try:
-                if check():
+        for framework, (relative_path, marker) in FRAMEWORK_MARKERS.items():
+            if marker == 'dir':
+                # Only stat inside directories the scan actually found
+                top_level = relative_path.split('/', 1)[0]
+                if top_level in directories and (path / relative_path).is_dir():
+                    frameworks.append(framework)
+            elif marker.startswith('substr:'):
+                if marker[len('substr:'):] in found[relative_path]:
                     frameworks.append(framework)
-            except:
-                pass
 
         return frameworks
 
     async def _generate_content(self, path: Path, structure: Dict, analysis: Dict) -> str:
-        """Generate README content using AI"""
+        """Generate README body using AI; generate_readme adds the header"""
 
+        # Lists are sorted so directory listing order cannot change the prompt
+        # and miss the response cache
         prompt = f"""
         Generate a comprehensive README.md for this project:
 
         Path: {path}
         Type: {analysis['type']}
-        Frameworks: {', '.join(analysis['frameworks'])}
+        Frameworks: {', '.join(sorted(analysis['frameworks']))}
 
         Project Structure:
-        Directories: {', '.join(structure['directories'])}
-        Key Files: {', '.join(structure['key_files'].keys())}
+        Directories: {', '.join(sorted(structure['directories']))}
+        Key Files: {', '.join(sorted(structure['key_files']))}
 
-        Services: {', '.join(analysis['services'])}
+        Services: {', '.join(sorted(analysis['services']))}
         Dependencies: {len(analysis['dependencies'])} packages
 
         Create a professional README with:
@@ -218,55 +335,123 @@ class IntelligentReadmeSystem:
         Be concise but comprehensive.
         """
 
-        response = self.gemini_model.generate_content(prompt)
+        return await self._generate_cached(prompt)
 
-        # Add auto-generation notice
-        header = f"""<!-- AUTO-GENERATED README -->
-<!-- Generated: {datetime.utcnow().isoformat()} -->
-<!-- System: Intelligent README Generator -->
+    async def _generate_cached(self, prompt: str) -> str:
+        """Gemini response text for a prompt, reusing the stored response to an identical prompt"""
 
-"""
+        key = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+        if key in self._responses:
+            self._responses.move_to_end(key)
+            return self._responses[key]
 
-        return header + response.text
-
-    async def _track_generation(self, path: str, content: str):
+        doc_ref = self.firestore_db.collection('ai_response_cache').document(key)
+        snapshot = doc_ref.get()
+        if snapshot.exists:
+            text = snapshot.get('text')
+        else:
+            text = self.gemini_model.generate_content(prompt).text
+            self._queue_write(doc_ref, {
+                'text': text,
+                'expires_at': datetime.utcnow() + AI_RESPONSE_CACHE_TTL
+            })
+
+        self._responses[key] = text
+        if len(self._responses) > AI_RESPONSE_CACHE_SIZE:
+            self._responses.popitem(last=False)
+        return text
+
+    async def _track_generation(self, path: str, content_hash: str, length: int):
         """Track README generation"""
-        self.firestore_db.collection('readme_generations').document().set({
+        self._queue_write(self.firestore_db.collection('readme_generations').document(), {
             'path': path,
             'timestamp': datetime.utcnow(),
-            'content_hash': hash(content),
-            'length': len(content)
+            'content_hash': content_hash,
+            'length': length
         })
 
-    async def _setup_auto_update(self, path: Path):
+    async def _setup_auto_update(self, path: Path, content_hash: str):
         """Setup automatic README updates"""
         # Create a watcher file
-        watcher_path = path / '.readme_watcher.json'
-        watcher_path.write_text(json.dumps({
+        watcher_path = path / WATCHER_FILENAME
+        watcher_path.write_text(_dumps_pretty({
             'enabled': True,
             'last_update': datetime.utcnow().isoformat(),
-            'update_interval_hours': 24
-        }, indent=2))
+            'update_interval_hours': 24,
+            'content_hash': content_hash
+        }))
+
+    def _read_watcher(self, path: Path) -> Dict:
+        """Watcher settings for a directory, empty if it has none"""
+        try:
+            return _loads((path / WATCHER_FILENAME).read_bytes())
+        except (OSError, ValueError):
+            return {}
 
     async def update_all_readmes(self):
         """Update all tracked READMEs"""
 
         # Find all README watchers
-        watchers = list(self.project_root.rglob('.readme_watcher.json'))
+        watchers = self._find_watchers()
 
-        for watcher in watchers:
-            config = json.loads(watcher.read_text())
+        with self.batched():
+            for watcher in watchers:
+                config = _loads(watcher.read_bytes())
 
-            if not config.get('enabled'):
-                continue
+                if not config.get('enabled'):
+                    continue
+
+                # Check if update needed
+                last_update = datetime.fromisoformat(config['last_update'])
+                hours_since = (datetime.utcnow() - last_update).total_seconds() / 3600
+
+                if hours_since >= config['update_interval_hours']:
+                    print(f"🔄 Updating README: {watcher.parent}")
+                    await self.generate_readme(str(watcher.parent))
+
+    def _find_watchers(self) -> List[Path]:
+        """
+        Find every README watcher below project_root.
 
-            # Check if update needed
-            last_update = datetime.fromisoformat(config['last_update'])
-            hours_since = (datetime.utcnow() - last_update).total_seconds() / 3600
+        A directory's mtime only changes when entries are added, removed or
+        renamed in it, so directories whose mtime matches the last search reuse
+        its listing and cost one stat instead of a full scandir.
+        """
+        watchers = []
+        visited = {}
+        pending = [str(self.project_root)]
+
+        while pending:
+            directory = pending.pop()
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
 
-            if hours_since >= config['update_interval_hours']:
-                print(f"🔄 Updating README: {watcher.parent}")
-                await self.generate_readme(str(watcher.parent))
+            cached = self._watcher_dirs.get(directory)
+            if cached is not None and cached[0] == mtime:
+                subdirectories, has_watcher = cached[1], cached[2]
+            else:
+                subdirectories, has_watcher = [], False
+                try:
+                    with os.scandir(directory) as entries:
+                        for entry in entries:
+                            if entry.is_dir(follow_symlinks=False):
+                                if entry.name not in _SKIP_DIRS:
+                                    subdirectories.append(entry.path)
+                            elif entry.name == WATCHER_FILENAME:
+                                has_watcher = True
+                except OSError:
+                    continue
+
+            visited[directory] = (mtime, subdirectories, has_watcher)
+            if has_watcher:
+                watchers.append(Path(directory) / WATCHER_FILENAME)
+            pending.extend(subdirectories)
+
+        # Directories that have disappeared drop out of the cache
+        self._watcher_dirs = visited
+        return watchers
 
     def _load_templates(self) -> Dict:
         """Load README templates"""
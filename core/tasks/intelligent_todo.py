@@ -4,14 +4,42 @@ AI-powered task management with auto-prioritization,
 dependency resolution, and proactive execution
 """
 
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 from enum import Enum
 from dataclasses import dataclass, asdict
+import hashlib
 import json
 import google.generativeai as genai
 from google.cloud import firestore
 
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:  # orjson is optional
+    _loads = json.loads
+
+
+# Queued Firestore writes are committed at this size, under the 500-op cap
+FIRESTORE_BATCH_LIMIT = 400
+
+# Gemini responses kept in memory; older ones are re-read from Firestore's
+# ai_response_cache collection, whose expires_at field drives a TTL policy
+AI_RESPONSE_CACHE_SIZE = 512
+AI_RESPONSE_CACHE_TTL = timedelta(days=7)
+
+# Next best actions are ranked from pages of this many times the requested
+# number of top-priority tasks, leaving room for those still blocked on
+# dependencies; further pages are read while too few are unblocked
+CANDIDATE_OVERFETCH = 3
+
+# Threads used to overlap the dashboard's aggregation queries
+DASHBOARD_QUERY_WORKERS = 4
+
 
 class TaskStatus(Enum):
     NOT_STARTED = "not_started"
@@ -29,7 +57,7 @@ class TaskPriority(Enum):
     BACKLOG = 5
 
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     id: str
     title: str
@@ -51,6 +79,20 @@ class Task:
     expected_value: float  # ROI or impact
 
 
+# Stored tasks hold enum values; these map them back without an Enum lookup
+_STATUS_BY_VALUE = {status.value: status for status in TaskStatus}
+_PRIORITY_BY_VALUE = {priority.value: priority for priority in TaskPriority}
+
+
+def _task_from_dict(data: Dict) -> Task:
+    """Rebuild a Task from its Firestore document"""
+    return Task(**{
+        **data,
+        'status': _STATUS_BY_VALUE[data['status']],
+        'priority': _PRIORITY_BY_VALUE[data['priority']]
+    })
+
+
 class IntelligentTodoSystem:
     """
     Self-organizing task management system
@@ -65,6 +107,14 @@ class IntelligentTodoSystem:
         self.tasks_collection = 'intelligent_tasks'
         self.suggestions_collection = 'task_suggestions'
 
+        # Firestore writes are queued and committed together
+        self._write_batch = self.firestore_db.batch()
+        self._pending_writes = 0
+        self._batch_depth = 0
+
+        # Gemini responses by prompt hash, least recently used first
+        self._responses: OrderedDict = OrderedDict()
+
     async def create_task(
         self,
         title: str,
@@ -108,8 +158,42 @@ class IntelligentTodoSystem:
         if task.auto_executable and task.confidence_score > 0.85:
             await self._attempt_auto_execution(task)
 
+        if not self._batch_depth:
+            self.flush()
+
         return task
 
+    @contextmanager
+    def batched(self):
+        """
+        Group several task writes into as few Firestore commits as possible.
+
+            with todo_system.batched():
+                for title, description in backlog:
+                    await todo_system.create_task(title, description)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.flush()
+
+    def flush(self):
+        """Commit all queued Firestore writes"""
+        if self._pending_writes:
+            self._write_batch.commit()
+            self._write_batch = self.firestore_db.batch()
+            self._pending_writes = 0
+
+    def _queue_write(self, doc_ref, data: Dict):
+        """Add a document write to the current batch, committing it when full"""
+        self._write_batch.set(doc_ref, data)
+        self._pending_writes += 1
+        if self._pending_writes >= FIRESTORE_BATCH_LIMIT:
+            self.flush()
+
     async def _analyze_task_with_ai(self, task: Task) -> Dict:
         """Comprehensive AI task analysis"""
 
@@ -134,10 +218,8 @@ class IntelligentTodoSystem:
         Return valid JSON only.
         """
 
-        response = self.gemini_model.generate_content(prompt)
-
         try:
-            analysis = json.loads(response.text)
+            analysis = _loads(await self._generate_cached(prompt))
             return analysis
         except json.JSONDecodeError:
             # Fallback to defaults
@@ -175,40 +257,70 @@ class IntelligentTodoSystem:
     async def get_next_best_actions(self, limit: int = 5) -> List[Task]:
         """AI-curated list of next best actions"""
 
-        # Get all available tasks
-        query = self.firestore_db.collection(self.tasks_collection).where(
-            'status', '==', TaskStatus.NOT_STARTED.value
-        ).stream()
-
-        tasks = [Task(**doc.to_dict()) for doc in query]
+        if limit < 1:
+            return []
 
-        # Filter by dependencies met
-        available_tasks = [t for t in tasks if await self._dependencies_met(t)]
+        tasks_ref = self.firestore_db.collection(self.tasks_collection)
+        query = tasks_ref.where(
+            'status', '==', TaskStatus.NOT_STARTED.value
+        ).order_by('priority').order_by(
+            'expected_value', direction=firestore.Query.DESCENDING
+        )
+        page_size = limit * CANDIDATE_OVERFETCH
 
-        # Rank by impact score
-        ranked_tasks = sorted(
-            available_tasks,
-            key=lambda t: (
+        def rank_key(t: Task) -> tuple:
+            return (
                 t.priority.value,  # Lower number = higher priority
                 -t.expected_value,  # Higher value first
                 -t.risk_level  # Higher risk first
             )
-        )
 
-        return ranked_tasks[:limit]
+        # Page through candidates, ordered on the server, until enough have
+        # their dependencies met. A page ending level with the last pick may
+        # be followed by a riskier task of equal rank, so paging goes on then.
+        available_tasks = []
+        dep_tasks = {}
+        fetched_deps = set()
+        last_doc = None
+        while True:
+            page = query if last_doc is None else query.start_after(last_doc)
+            docs = list(page.limit(page_size).stream())
+            if not docs:
+                break
+            last_doc = docs[-1]
+            tasks = [_task_from_dict(doc.to_dict()) for doc in docs]
+
+            # Fetch dependencies not seen on earlier pages in a single multi-get
+            dep_ids = {dep_id for t in tasks for dep_id in t.dependencies} - fetched_deps
+            if dep_ids:
+                fetched_deps |= dep_ids
+                for dep_doc in self.firestore_db.get_all([tasks_ref.document(dep_id) for dep_id in dep_ids]):
+                    if dep_doc.exists:
+                        dep_tasks[dep_doc.id] = _task_from_dict(dep_doc.to_dict())
+
+            # Filter by dependencies met
+            available_tasks += [t for t in tasks if self._dependencies_met(t, dep_tasks)]
+
+            if len(docs) < page_size:
+                break
+            if len(available_tasks) >= limit:
+                cutoff = sorted(available_tasks, key=rank_key)[limit - 1]
+                if rank_key(cutoff)[:2] != rank_key(tasks[-1])[:2]:
+                    break
+
+        # Rank by impact score
+        ranked_tasks = sorted(available_tasks, key=rank_key)
 
-    async def _dependencies_met(self, task: Task) -> bool:
-        """Check if all dependencies are completed"""
+        return ranked_tasks[:limit]
 
-        if not task.dependencies:
-            return True
+    def _dependencies_met(self, task: Task, dep_tasks: Dict[str, Task]) -> bool:
+        """Check if all dependencies are completed, given the prefetched dependency tasks"""
 
         for dep_id in task.dependencies:
-            dep_doc = self.firestore_db.collection(self.tasks_collection).document(dep_id).get()
-            if not dep_doc.exists:
+            dep_task = dep_tasks.get(dep_id)
+            if dep_task is None:
                 continue
 
-            dep_task = Task(**dep_doc.to_dict())
             if dep_task.status != TaskStatus.COMPLETED:
                 return False
 
@@ -224,6 +336,10 @@ class IntelligentTodoSystem:
         task.updated_at = datetime.utcnow()
         await self._store_task(task)
 
+        # Make the in-progress status visible while the task runs
+        if not self._batch_depth:
+            self.flush()
+
         # Execute based on tags
         try:
             if 'data_collection' in task.tags:
@@ -260,15 +376,39 @@ class IntelligentTodoSystem:
         Provide execution steps and results.
         """
 
-        response = self.gemini_model.generate_content(prompt)
+        result = await self._generate_cached(prompt)
 
         # Store execution log
-        self.firestore_db.collection('task_executions').document().set({
+        self._queue_write(self.firestore_db.collection('task_executions').document(), {
             'task_id': task.id,
             'timestamp': datetime.utcnow(),
-            'result': response.text
+            'result': result
         })
 
+    async def _generate_cached(self, prompt: str) -> str:
+        """Gemini response text for a prompt, reusing the stored response to an identical prompt"""
+
+        key = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+        if key in self._responses:
+            self._responses.move_to_end(key)
+            return self._responses[key]
+
+        doc_ref = self.firestore_db.collection('ai_response_cache').document(key)
+        snapshot = doc_ref.get()
+        if snapshot.exists:
+            text = snapshot.get('text')
+        else:
+            text = self.gemini_model.generate_content(prompt).text
+            self._queue_write(doc_ref, {
+                'text': text,
+                'expires_at': datetime.utcnow() + AI_RESPONSE_CACHE_TTL
+            })
+
+        self._responses[key] = text
+        if len(self._responses) > AI_RESPONSE_CACHE_SIZE:
+            self._responses.popitem(last=False)
+        return text
+
     async def auto_suggest_tasks(self) -> List[Dict]:
         """Proactive task suggestions"""
 
@@ -305,13 +445,17 @@ class IntelligentTodoSystem:
             })
 
         # Store suggestions
+        suggestions_ref = self.firestore_db.collection(self.suggestions_collection)
         for suggestion in suggestions:
-            self.firestore_db.collection(self.suggestions_collection).document().set({
+            self._queue_write(suggestions_ref.document(), {
                 **suggestion,
                 'created_at': datetime.utcnow(),
                 'status': 'pending'
             })
 
+        if not self._batch_depth:
+            self.flush()
+
         return suggestions
 
     async def _identify_gaps(self) -> List[Dict]:
@@ -346,12 +490,8 @@ class IntelligentTodoSystem:
 
     def _extract_focus_areas(self, tasks: List[Task]) -> List[str]:
         """Extract main focus areas from tasks"""
-        all_tags = []
-        for task in tasks:
-            all_tags.extend(task.tags)
-
-        from collections import Counter
-        return [tag for tag, count in Counter(all_tags).most_common(5)]
+        tag_counts = Counter(tag for task in tasks for tag in task.tags)
+        return [tag for tag, count in tag_counts.most_common(5)]
 
     def _generate_task_id(self) -> str:
         """Generate unique task ID"""
@@ -366,28 +506,38 @@ class IntelligentTodoSystem:
         task_dict['status'] = task.status.value
         task_dict['priority'] = task.priority.value
 
-        doc_ref.set(task_dict)
+        self._queue_write(doc_ref, task_dict)
 
     def get_dashboard(self) -> Dict:
         """Task analytics dashboard"""
 
-        # Count tasks by status
-        all_tasks = list(self.firestore_db.collection(self.tasks_collection).stream())
-        tasks = [Task(**doc.to_dict()) for doc in all_tasks]
+        # Count tasks by status and priority with server-side aggregations
+        tasks_ref = self.firestore_db.collection(self.tasks_collection)
+        aggregations = {
+            **{('status', status.value): tasks_ref.where('status', '==', status.value).count()
+               for status in TaskStatus},
+            **{('priority', priority.value): tasks_ref.where('priority', '==', priority.value).count()
+               for priority in TaskPriority},
+            ('avg_completion', None): tasks_ref.where(
+                'status', '==', TaskStatus.COMPLETED.value
+            ).avg('actual_duration')
+        }
 
-        from collections import Counter
-        status_counts = Counter(t.status for t in tasks)
-        priority_counts = Counter(t.priority for t in tasks)
+        # Each aggregation is one round trip; a few threads overlap them
+        with ThreadPoolExecutor(max_workers=DASHBOARD_QUERY_WORKERS) as executor:
+            futures = {key: executor.submit(query.get) for key, query in aggregations.items()}
+        results = {key: future.result()[0][0].value for key, future in futures.items()}
 
-        completed_tasks = [t for t in tasks if t.status == TaskStatus.COMPLETED and t.actual_duration]
-        avg_completion = sum(t.actual_duration for t in completed_tasks) / len(completed_tasks) if completed_tasks else 0
+        status_counts = {value: int(results['status', value]) for value in (s.value for s in TaskStatus)}
+        priority_counts = {value: int(results['priority', value]) for value in (p.value for p in TaskPriority)}
+        total = sum(status_counts.values())
 
         return {
-            'total_tasks': len(tasks),
-            'by_status': {status.value: count for status, count in status_counts.items()},
-            'by_priority': {priority.value: count for priority, count in priority_counts.items()},
-            'avg_completion_time_minutes': avg_completion,
-            'completion_rate': len([t for t in tasks if t.status == TaskStatus.COMPLETED]) / len(tasks) if tasks else 0
+            'total_tasks': total,
+            'by_status': {status: count for status, count in status_counts.items() if count},
+            'by_priority': {priority: count for priority, count in priority_counts.items() if count},
+            'avg_completion_time_minutes': results['avg_completion', None] or 0,
+            'completion_rate': status_counts[TaskStatus.COMPLETED.value] / total if total else 0
         }
 
 